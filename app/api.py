@@ -1,48 +1,74 @@
 import logging
+import hashlib
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
 from fastapi.concurrency import run_in_threadpool
-from app.core_matcher import core_matcher
-# from app.redis_cache import save_user_query_to_redis, get_user_queries_from_redis
-from app.db import get_all_categories, get_all_sellers, get_store_by_id
+from pydantic import TypeAdapter
+from app.core_matcher import get_core_matcher
+from app.redis_cache import save_user_query_to_redis, get_user_queries_from_redis, is_history_enabled
+from app.db import get_all_categories_cached, get_all_sellers_cached, get_store_by_id_cached
 from app.schemas import (
     ProductMatchingRequest,
     ProductMatchingResponse,
     Category,
     Seller,
-    # UserQueriesResponse,
-    # RedisStoreData
+    UserQueriesResponse,
+    RedisStoreData
 )
 from app.rails import validation_rails
-# from app.background_tasks import warm_cache_for_user_background
 from typing import List
 import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+CATALOG_MAX_AGE = 300
+_categories_adapter = TypeAdapter(List[Category])
+_sellers_adapter = TypeAdapter(List[Seller])
+# name -> (db result, payload); the db layer's TTL cache decides freshness, a new result object rebuilds the payload
+_catalog_payloads = {}
+
+async def _catalog_response(request: Request, name: str, loader, adapter: TypeAdapter) -> Response:
+    """Serve a catalog list as pre-serialized JSON with ETag revalidation"""
+    data = await run_in_threadpool(loader)
+    cached = _catalog_payloads.get(name)
+    if cached is not None and cached[0] is data:
+        payload = cached[1]
+    else:
+        body = adapter.dump_json(adapter.validate_python(data))
+        payload = (body, f'"{hashlib.md5(body).hexdigest()}"', len(data))
+        if data:
+            _catalog_payloads[name] = (data, payload)
+
+    body, etag, count = payload
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    # Weak comparison, as If-None-Match requires: W/ prefixes are ignored and "*" matches any current representation
+    client_tags = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if "*" in client_tags or etag in client_tags:
+        logger.info("%s not modified - returning 304", name)
+        return Response(status_code=304, headers=headers)
+
+    logger.info("Returning %s %s", count, name)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/categories", response_model=List[Category])
-async def get_categories():
+async def get_categories(request: Request):
     """Get all available categories"""
     logger.info("GET /categories endpoint called")
     try:
-        categories = await run_in_threadpool(get_all_categories)
-        logger.info(f"Returning {len(categories)} categories")
-        return categories
+        return await _catalog_response(request, "categories", get_all_categories_cached, _categories_adapter)
     except Exception as e:
-        logger.error(f"Error in get_categories: {e}")
+        logger.error("Error in get_categories: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sellers", response_model=List[Seller])
-async def get_sellers():
+async def get_sellers(request: Request):
     """Get all available sellers/stores"""
     logger.info("GET /sellers endpoint called")
     try:
-        sellers = await run_in_threadpool(get_all_sellers)
-        logger.info(f"Returning {len(sellers)} sellers")
-        return sellers
+        return await _catalog_response(request, "sellers", get_all_sellers_cached, _sellers_adapter)
     except Exception as e:
-        logger.error(f"Error in get_sellers: {e}")
+        logger.error("Error in get_sellers: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ProductMatching", response_model=ProductMatchingResponse)
@@ -51,7 +77,7 @@ async def product_matching(request: ProductMatchingRequest, background_tasks: Ba
     ProductMatching endpoint with async processing
     """
     start_time = time.time()
-    logger.info(f"ProductMatching called for user: {request.user_id}, store: {request.store_id}")
+    logger.info("ProductMatching called for user: %s, store: %s", request.user_id, request.store_id)
     valid_query, query_msg = validation_rails.validate_query(request.query)
     if not valid_query:
         raise HTTPException(status_code=400, detail=query_msg)
@@ -64,35 +90,26 @@ async def product_matching(request: ProductMatchingRequest, background_tasks: Ba
     if not valid_store:
         raise HTTPException(status_code=400, detail=store_msg)
     
-    store = await run_in_threadpool(get_store_by_id, request.store_id)
+    store = await run_in_threadpool(get_store_by_id_cached, request.store_id)
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
 
     try:
+        core_matcher = get_core_matcher()
         logger.info("Starting ASYNC ingredient generation and product matching...")
+        history_enabled = is_history_enabled()
+        # Metadata only feeds the stored history - when needed it comes from the same LLM call as the ingredients
         result = await core_matcher.generate_ingredients_and_match_products_async(
             request.query, 
-            request.store_id
+            request.store_id,
+            with_metadata=history_enabled
         )
 
         all_generated_categories = result.get("all_generated_categories", [])
         matched_products = result.get("matched_products", [])
-        sanitized_results = await run_in_threadpool(validation_rails.sanitize_product_results, matched_products)
-        # metadata = await core_matcher.infer_metadata_async(request.query)
+        sanitized_results = validation_rails.sanitize_product_results(matched_products)
         
         current_timestamp = datetime.now().isoformat()
-        # redis_data = RedisStoreData(
-        #     user_id=request.user_id,
-        #     store_id=request.store_id,
-        #     query=request.query,
-        #     timestamp=current_timestamp,
-        #     all_generated_categories=all_generated_categories,  
-        #     matched_products=sanitized_results, 
-        #     **metadata
-        # )
-        # background_tasks.add_task(save_user_query_to_redis, request.user_id, redis_data.model_dump())
-        # background_tasks.add_task(warm_cache_for_user_background, request.user_id, request.store_id)
-        
         response = ProductMatchingResponse(
             query=request.query,
             user_id=request.user_id,
@@ -101,29 +118,49 @@ async def product_matching(request: ProductMatchingRequest, background_tasks: Ba
             matched_products=sanitized_results
         )
 
+        if history_enabled:
+            # Reuse the already-validated product models rather than validating the results twice
+            redis_data = RedisStoreData(
+                user_id=request.user_id,
+                store_id=request.store_id,
+                query=request.query,
+                timestamp=current_timestamp,
+                all_generated_categories=all_generated_categories,  
+                matched_products=response.matched_products, 
+                **result.get("metadata", {})
+            )
+            background_tasks.add_task(save_user_query_to_redis, request.user_id, redis_data.model_dump())
+
         end_time = time.time()
         processing_time = end_time - start_time
-        logger.info(f"processing completed in {processing_time:.2f}s - Generated: {len(all_generated_categories)}, Matched: {len(sanitized_results)}")
+        logger.info("processing completed in %.2fs - Generated: %s, Matched: %s", processing_time, len(all_generated_categories), len(sanitized_results))
         
         return response
 
     except Exception as e:
-        logger.error(f"Error in product matching: {e}")
+        logger.error("Error in product matching: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-# @router.get("/redis/{user_id}", response_model=UserQueriesResponse)
-# async def get_user_queries(user_id: str):
-#     """Get user search history from Redis"""
-#     logger.info(f"GET /redis/{user_id} endpoint called")
+@router.get("/metrics")
+async def get_metrics():
+    """In-process cache statistics for this worker"""
+    return get_core_matcher().cache_metrics()
+
+@router.get("/redis/{user_id}", response_model=UserQueriesResponse)
+async def get_user_queries(user_id: str):
+    """Get user search history from Redis"""
+    logger.info("GET /redis/%s endpoint called", user_id)
+    if not is_history_enabled():
+        raise HTTPException(status_code=404, detail="User history is disabled")
     
-#     valid_uid, uid_msg = validation_rails.validate_user_id(user_id)
-#     if not valid_uid:
-#         raise HTTPException(status_code=400, detail=uid_msg)
+    valid_uid, uid_msg = validation_rails.validate_user_id(user_id)
+    if not valid_uid:
+        raise HTTPException(status_code=400, detail=uid_msg)
     
-#     try:
-#         queries = await run_in_threadpool(get_user_queries_from_redis, user_id)
-#         return {"queries": queries if queries else []}
+    try:
+        queries = await get_user_queries_from_redis(user_id)
+        return {"queries": queries if queries else []}
         
-#     except Exception as e:
-#         logger.error(f"Error retrieving user queries: {e}")
-#         raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        logger.error("Error retrieving user queries: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
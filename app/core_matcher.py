@@ -1,33 +1,422 @@
 import logging
 import os
 import json
+import orjson
 import re
-from langchain_openai import ChatOpenAI
+import httpx
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from dotenv import load_dotenv
-from rapidfuzz import fuzz
-from app.db import get_categories_by_store, get_optimized_products_for_matching
-from app.utils import safe_float
-import urllib.parse
+from rapidfuzz import fuzz, process
+import numpy as np
+from cachetools import TLRUCache, TTLCache
+from app.db import get_categories_by_store_async, get_optimized_products_for_matching_async
+from app.utils import safe_float, normalize_text, is_accessory, singular_words
+from app.llm_cache import SemanticCache, semantic_cache, open_persistent_cache, prompt_cache_key
+from app.redis_cache import get_validation_decisions, save_validation_decisions
 import asyncio
+import hashlib
+import functools
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import time
-import threading
 
 logger = logging.getLogger(__name__)
 load_dotenv(override=True)
 
+_WORD_RE = re.compile(r'[a-z0-9]+')
+# One "3:Y" (or "3: YES", "3. N") decision in a validation answer
+_INDEXED_ANSWER_RE = re.compile(r'(\d+)\s*[:.)=-]\s*([YN])', re.IGNORECASE)
+# Whole-word YES/NO, folded to Y/N before an unindexed answer is stripped down to its letters
+_YES_NO_RE = re.compile(r'\b(Y)ES\b|\b(N)O\b')
+
+LLM_SEED = 42
+# Process-wide cap on in-flight OpenAI requests to stay under the account's rate limits
+MAX_CONCURRENT_LLM_CALLS = 50
+# Process-wide cap on product preparation / fuzzy matching jobs handed to the executor, so bursts queue
+# on the event loop instead of piling score matrices up behind the thread pool
+MAX_CONCURRENT_MATCH_JOBS = 8
+# Item/product pairs validated per LLM call - larger batches amortize the fixed prompt and round-trip per pair
+VALIDATION_BATCH_SIZE = 40
+# One retry, with STRICT_JSON_REMINDER appended, when the ingredient stream yields malformed JSON
+GENERATION_ATTEMPTS = 2
+STRICT_JSON_REMINDER = "\n\nReturn valid JSON only."
+VALIDATION_CACHE_SIZE = 20000
+VALIDATION_CACHE_TTL = 3600
+# Ingredient lists drive the whole response, so only close paraphrases may share one
+GENERATION_SIMILARITY_THRESHOLD = 0.92
+PRODUCT_CACHE_SIZE = 1024
+PRODUCT_CACHE_TTL = 300
+CATEGORY_CACHE_SIZE = 1024
+CATEGORY_CACHE_TTL = 300
+_JSON_DECODER = json.JSONDecoder()
+CATEGORY_FUZZY_CUTOFF = 80
+# How long a partial validation batch waits for other categories' pairs before it is sent
+VALIDATION_COALESCE_WINDOW = 0.02
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+_FILENAME_SEPARATORS = str.maketrans("-_.", "   ")
+MAX_MATCHES_PER_ITEM = 10
+# Candidates scoring at least this whose name is just the item plus pack size skip LLM validation
+AUTO_ACCEPT_SCORE = 95
+_QUANTITY_UNITS = frozenset({"g", "gm", "gms", "gram", "grams", "kg", "kgs", "ml", "l", "lt", "ltr", "litre", "liter",
+                             "pc", "pcs", "pack", "packet", "x"})
+
+def _json_schema_format(name: str, schema: dict):
+    """OpenAI structured-output response_format enforcing a strict JSON schema"""
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+def _string_list_schema():
+    """JSON schema for an array of strings"""
+    return {"type": "array", "items": {"type": "string"}}
+
+# OpenAI structured outputs allow at most 500 enum values per schema
+MAX_CATEGORY_ENUM_SIZE = 500
+
+def _categories_schema(category_names: tuple = ()):
+    """JSON schema for the generated categories; names are restricted to the store's categories when they fit in an enum"""
+    category_schema = {"type": "string"}
+    if category_names and len(category_names) <= MAX_CATEGORY_ENUM_SIZE:
+        category_schema["enum"] = list(dict.fromkeys(category_names))
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"category": category_schema, "items": _string_list_schema()},
+            "required": ["category", "items"],
+            "additionalProperties": False
+        }
+    }
+
+DEFAULT_METADATA = {
+    "dishbased": ["general"],
+    "cuisinebased": ["international"],
+    "dietarypreferences": ["mixed"],
+    "timebased": ["general"]
+}
+
+METADATA_SCHEMA = {
+    "type": "object",
+    "properties": {field: _string_list_schema() for field in DEFAULT_METADATA},
+    "required": list(DEFAULT_METADATA),
+    "additionalProperties": False
+}
+
+@functools.lru_cache(maxsize=256)
+def _ingredients_response_format(category_names: tuple, with_metadata: bool = False):
+    """Structured-output format for ingredient generation against one set of store categories"""
+    properties = {"categories": _categories_schema(category_names)}
+    if with_metadata:
+        properties["metadata"] = METADATA_SCHEMA
+    return _json_schema_format("ingredients_with_metadata" if with_metadata else "ingredients", {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    })
+
+METADATA_FIELD_GUIDE = '''- dishbased: Main dish/recipe mentioned (e.g., "biryani", "pasta", "salad")
+            - cuisinebased: Cuisine type (e.g., "Indian", "Italian", "Chinese", "International")
+            - dietarypreferences: Diet type (e.g., "Vegetarian", "Non-Vegetarian", "Vegan", "Mixed")
+            - timebased: Meal timing (e.g., "breakfast", "lunch", "dinner", "snack", "general")'''
+
+# Static validation instructions, sent as the system message so every batch shares one cacheable prefix
+VALIDATION_SYSTEM_PROMPT = """You are a STRICT product relevance validator for a grocery shopping assistant.
+Based on the real world examples, determine if each product is RELEVANT (Y) or NOT RELEVANT (N) to the user's query.
+You get the user's query and numbered 'item' → 'product' pairs, each prefixed with the store category it was matched in.
+
+**STRICT VALIDATION RULES:**
+
+Answer Y if:
+1. The product is an EXACT match for the requested item
+2. The product is a direct brand/size variant (e.g., "Amul Ghee 1L" for "ghee")
+3. The product serves the EXACT same purpose in the context of the user's query
+
+Answer N if:
+1. Product is a TOOL/ACCESSORY when ingredient was requested (e.g., "Oil Dispenser" ≠ "oil")
+2. Product is from WRONG cuisine/category (e.g., "Chinese Rice" ≠ "biryani rice")
+3. Product is PROCESSED VERSION when raw item requested (e.g., "Ketchup" ≠ "tomato")
+4. Product name contains keyword but serves DIFFERENT purpose (e.g., "Rice Cooker" ≠ "rice")
+5. Product is tangentially related but NOT directly needed
+6. You have ANY reasonable doubt about relevance
+
+**EXAMPLES TO REJECT:**
+- Request: "oil" → Product: "Oil Dispenser" → N (it's a container)
+- Request: "rice" → Product: "Rice Flour" → N (flour, not rice grains)
+- Request: "biryani rice" → Product: "Chinese Rice" → N (wrong cuisine)
+- Request: "tomato" → Product: "Tomato Sauce" → N (processed, not fresh)
+- Request: "cumin" → Product: "Cumin Powder Mix Masala" → N (mix, not pure cumin)
+
+**EXAMPLES TO ACCEPT:**
+- Request: "ghee" → Product: "Amul Ghee 500ml" → Y (brand variant)
+- Request: "biryani masala" → Product: "Annapoorna Biryani Masala" → Y (exact match)
+- Request: "salt" → Product: "Tata Salt 1kg" → Y (brand variant)
+- Request: "basmati rice" → Product: "India Gate Basmati Rice" → Y (exact match)
+
+Respond ONLY with the pair number and one letter per pair, comma-separated (e.g. "1:Y,2:N,3:Y"). No explanations."""
+
+# Appended after the ingredients prompt when metadata is inferred in the same call
+INGREDIENTS_METADATA_SUFFIX = f'''
+
+            Also return a "metadata" object for the user request next to "categories", with exactly one relevant value for each field:
+            {METADATA_FIELD_GUIDE}'''
+
+def _complete_metadata(metadata: dict):
+    """Metadata with every field present, defaults filling the gaps"""
+    return {field: metadata.get(field, list(default)) for field, default in DEFAULT_METADATA.items()}
+
+def _meal_metadata(meal_time: str):
+    """Default metadata with only the meal time filled in"""
+    return {**DEFAULT_METADATA, "timebased": [meal_time]}
+
+# Trivial queries whose metadata is known without asking the LLM
+SIMPLE_QUERY_METADATA = {
+    "breakfast": _meal_metadata("breakfast"),
+    "lunch": _meal_metadata("lunch"),
+    "dinner": _meal_metadata("dinner"),
+    "snack": _meal_metadata("snack"),
+    "snacks": _meal_metadata("snack"),
+}
+
+# Everything up to the user request is identical for a given store so OpenAI can reuse the cached prompt prefix
+INGREDIENTS_PROMPT_TEMPLATE = '''You are a comprehensive SuperMarket expert with deep knowledge of ALL supermarket departments and items.
+
+                        Available Categories (ONLY use these exact names):
+                        {category_list}
+
+                        COMPREHENSIVE ANALYSIS REQUIRED:
+                        - Consider the complete shopping experience for this request
+                        - Include preparation tools, storage items, supplies if relevant  
+                        - Think about complementary items and alternatives
+                        - Consider dietary restrictions, cultural preferences, seasonal availability
+                        - Include both essential and optional items for the best experience
+                        - Think about quantity, storage, and meal planning needs
+
+                        Response format (JSON only):
+                        {{
+                        "categories": [
+                            {{
+                            "category": "<exact category name from list>",
+                            "items": ["essential_item1", "essential_item2", "optional_item3", "alternative_item4"]
+                            }}
+                        ]
+                        }}
+
+                        IMPORTANT: Use ONLY category names exactly as listed above. Consider ALL possible supermarket items that would enhance the user's experience.
+                        If user asked for a specific product (e.g., "olive oil"), include related items (e.g., "vinegar", "salad dressing") in the same or related categories.
+                        If user mentions a specific brand/product name (e.g., "Achi sambar masala"), include that EXACT product name in the relevant category.
+                        If user asked about dish or cooking items you only needs to show the related items not Household Cleaning or Baby Care unless he specifically asks for them.
+                        If user requests a dish (e.g., "biryani"), include all ingredients, spices, and accompaniments needed for that dish, Don't include unrelated items(eg. Tea, Coffee & Beverages or Some irrelvent mixs).
+
+                        User request: "{user_query}"
+
+                        Respond with ONLY the JSON structure above:'''
+
+@functools.lru_cache(maxsize=256)
+def _format_category_block(category_names: tuple):
+    """Render the prompt's category list once per distinct set of store categories"""
+    return "\n".join(f'- {name}' for name in category_names)
+
+def _canonical_category_key(name: str):
+    """Collapse case, spacing, punctuation and "&"/"and" differences in a category name to a single lookup key"""
+    return "".join(word for word in _WORD_RE.findall(name.lower()) if word != "and")
+
+def _loose_category_key(name: str):
+    """Canonical key built from singular word forms, so "Spices & Seasonings" and "Spice and Seasoning" collide"""
+    return "".join(word for word in singular_words(name) if word != "and")
+
+def _closest_containing(key: str, candidates: list):
+    """Among (name, category) pairs where key and name contain one another, pick the closest in length"""
+    best, best_ratio = None, 0.0
+    for name, cat in candidates:
+        if key and name and (key in name or name in key):
+            ratio = min(len(key), len(name)) / max(len(key), len(name))
+            if ratio > best_ratio:
+                best, best_ratio = cat, ratio
+    return best
+
+def _is_plain_item_name(item: str, product_name: str):
+    """True when the product name is the requested item plus at most pack-size tokens (e.g. "Basmati Rice 1kg" for "basmati rice")"""
+    name_words = [word for word in _WORD_RE.findall(product_name.lower())
+                  if word not in _QUANTITY_UNITS and not any(char.isdigit() for char in word)]
+    return bool(name_words) and name_words == _WORD_RE.findall(item.lower())
+
+def _parse_validation_answer(answer_text: str, pair_count: int):
+    """
+    One decision per pair from an indexed "1:Y,2:N" answer: True/False, or None for pairs the answer skips.
+    Unindexed answers ("Y,N,Y" or packed "YNY") are read in pair order; the pairs past the answered prefix stay None
+    """
+    decisions = [None] * pair_count
+    indexed = _INDEXED_ANSWER_RE.findall(answer_text)
+    if indexed:
+        for index, letter in indexed:
+            position = int(index) - 1
+            if 0 <= position < pair_count and decisions[position] is None:
+                decisions[position] = letter.upper() == 'Y'
+        return decisions
+
+    letters = re.sub(r'[^YN]', '', _YES_NO_RE.sub(r'\1\2', answer_text.upper()))[:pair_count]
+    for position, letter in enumerate(letters):
+        decisions[position] = letter == 'Y'
+    return decisions
+
+def _validation_cache_key(item: str, product_name: str, qc_key: str):
+    """Persistent-cache key of one validation decision"""
+    return f"validation:{item.lower()}|{product_name.lower()}|{qc_key}"
+
+def _category_names(available_categories: list):
+    """Store category names as a hashable tuple, in catalog order"""
+    return tuple(cat["name"] for cat in available_categories)
+
+def _ingredients_prompt(user_query: str, available_categories: list):
+    """Ingredients prompt for a store's categories"""
+    category_list = _format_category_block(_category_names(available_categories))
+    return INGREDIENTS_PROMPT_TEMPLATE.format(user_query=user_query, category_list=category_list)
+
+def _category_scope(available_categories: list):
+    """Partition key for cached ingredient lists - the prompt depends on the store's category names"""
+    names = "|".join(sorted(cat["name"] for cat in available_categories))
+    return hashlib.md5(names.encode()).hexdigest()
+
+def _is_complete_generation(result: dict):
+    """Semantic-cache filter for generations: only complete, non-empty ingredient lists are stored"""
+    return result["complete"] and bool(result["categories"])
+
+class _CategoryStreamParser:
+    """Incrementally pull complete category objects out of a streamed {"categories": [{...}, ...], ...} response"""
+
+    def __init__(self):
+        self.parts = []
+        self.current = None
+        self.containers = []
+        self.in_string = False
+        self.escaped = False
+        self.malformed = False
+
+    def feed(self, chunk: str):
+        """Consume a streamed chunk and return the category objects it completed; sets malformed on a bad object"""
+        self.parts.append(chunk)
+        completed = []
+        for ch in chunk:
+            if self.current is not None:
+                self.current.append(ch)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                # Category objects sit directly inside an array of the top-level object
+                if ch == '{' and self.containers == ['{', '[']:
+                    self.current = [ch]
+                self.containers.append(ch)
+            elif ch in '}]':
+                if self.containers:
+                    self.containers.pop()
+                if ch == '}' and self.current is not None and self.containers == ['{', '[']:
+                    text = "".join(self.current)
+                    self.current = None
+                    try:
+                        category_data = orjson.loads(text)
+                    except orjson.JSONDecodeError as e:
+                        logger.warning("Malformed streamed category object: %s", e)
+                        self.malformed = True
+                        break
+                    completed.append(category_data)
+        return completed
+
+    def text(self):
+        return "".join(self.parts)
+
+@dataclass
+class _Candidate:
+    """A fuzzy-matched product awaiting validation; the response dict is only built once it passes"""
+    __slots__ = ("product", "item", "score")
+    product: dict
+    item: str
+    score: float
+
+class _ValidationBatcher:
+    """Request-scoped queue packing validation pairs from concurrently matched categories into shared LLM batches"""
+
+    def __init__(self, matcher, query_context: str, window: float = VALIDATION_COALESCE_WINDOW):
+        self.matcher = matcher
+        self.query_context = query_context
+        self.window = window
+        self.pending = []
+        # (item, product_name) -> decision future, so a pair is sent to the LLM once per request
+        self.decisions = {}
+        self.tasks = set()
+        self.timer = None
+
+    async def validate(self, item_product_pairs: list, category_name: str):
+        """Queue one category's (item, product_name, score) pairs and wait for their YES/NO decisions"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item, product_name, score in item_product_pairs:
+            future = self.decisions.get((item, product_name))
+            if future is None:
+                future = loop.create_future()
+                self.decisions[(item, product_name)] = future
+                self.pending.append((item, product_name, category_name, future))
+            futures.append(future)
+        while len(self.pending) >= VALIDATION_BATCH_SIZE:
+            self._send(VALIDATION_BATCH_SIZE)
+        if self.pending and self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        # Shielded: decisions may be shared with other categories, which must not see this caller's cancellation
+        decisions = await asyncio.gather(*(asyncio.shield(future) for future in futures))
+        return {(item, product_name): decision for (item, product_name, score), decision in zip(item_product_pairs, decisions)}
+
+    def flush(self):
+        """Send every queued pair now"""
+        self._send(len(self.pending))
+
+    def _send(self, size: int):
+        batch, self.pending = self.pending[:size], self.pending[size:]
+        if not self.pending and self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if batch:
+            task = asyncio.ensure_future(self._validate_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _validate_batch(self, batch: list):
+        results = await self.matcher._process_strict_validation_batch_async(
+            [(item, product_name, category_name) for item, product_name, category_name, _ in batch], self.query_context
+        )
+        for item, product_name, _, future in batch:
+            if not future.done():
+                # None: the batch failed, so the pair is rejected for this request but never cached
+                future.set_result(results.get((item, product_name)))
+
 class OptimizedCoreMatcher:
     def __init__(self):
         logger.info("Initializing CoreMatcher with STRICT relevance filtering")
         self.llm = None
         self.validation_llm = None
-        self.llm_cache = {}
+        self.embeddings = None
+        # The matcher's caches are only touched from coroutines on the event loop thread, so they need no lock
+        # (item, product, query) -> (decision, monotonic expiry); per-entry expiry lets decisions loaded from the
+        # persistent tiers keep their remaining lifetime instead of restarting VALIDATION_CACHE_TTL
+        self.llm_cache = TLRUCache(maxsize=VALIDATION_CACHE_SIZE, ttu=lambda key, value, now: value[1])
+        self.llm_cache_stats = {"hits": 0, "misses": 0}
         self.similarity_cache = {}
-        self.product_cache = {}
-        self.category_cache = {}
-        self.cache_lock = threading.Lock()
+        # (store_id, category_id) -> products with their matching fields precomputed
+        self.product_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+        # store_id -> (available categories, their lookup index for _find_matching_category)
+        self.category_cache = TTLCache(maxsize=CATEGORY_CACHE_SIZE, ttl=CATEGORY_CACHE_TTL)
         self.executor = ThreadPoolExecutor(max_workers=6)
+        self.llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+        self.match_semaphore = asyncio.Semaphore(MAX_CONCURRENT_MATCH_JOBS)
         self._init_llm()
+        self.semantic_cache = SemanticCache(self.embeddings)
+        self.response_cache = open_persistent_cache()
         logger.info("CoreMatcher initialized successfully")
 
     def _init_llm(self):
@@ -37,76 +426,152 @@ class OptimizedCoreMatcher:
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not set in environment")
 
+            # One keep-alive connection pool for every OpenAI call, so warm TLS connections are reused across models
+            self.http_client = httpx.AsyncClient(limits=OPENAI_HTTP_LIMITS)
+            openai_client = openai.AsyncOpenAI(api_key=api_key, max_retries=2, http_client=self.http_client)
+
             self.llm = ChatOpenAI(
                 model="gpt-4.1-mini", 
                 openai_api_key=api_key, 
-                temperature=0.3,
+                temperature=0.0,
                 max_retries=2,
-                request_timeout=30
+                request_timeout=30,
+                model_kwargs={"response_format": {"type": "json_object"}, "seed": LLM_SEED},
+                async_client=openai_client.with_options(timeout=30).chat.completions
             )
             self.validation_llm = ChatOpenAI(
                 model="gpt-4.1-mini", 
                 openai_api_key=api_key, 
                 temperature=0.0,  
                 max_retries=2,
-                request_timeout=20
+                request_timeout=20,
+                model_kwargs={"seed": LLM_SEED},
+                async_client=openai_client.with_options(timeout=20).chat.completions
+            )
+            self.embeddings = OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                openai_api_key=api_key,
+                max_retries=2,
+                request_timeout=10,
+                async_client=openai_client.with_options(timeout=10).embeddings
             )
             logger.info("OpenAI LLM initialized successfully")
         except Exception as e:
-            logger.error(f"Error initializing LLM: {e}")
+            logger.error("Error initializing LLM: %s", e)
             raise ValueError(f"Failed to initialize LLM: {e}")
 
-    async def generate_ingredients_and_match_products_async(self, user_query: str, store_id: str):
+    async def aclose(self):
+        """Close the shared OpenAI connection pool and the persistent cache"""
+        await self.http_client.aclose()
+        if self.response_cache:
+            self.response_cache.close()
+
+    def cache_metrics(self):
+        """Validation cache hit/miss counters and the current size of each in-process cache"""
+        return {
+            "validation_cache": {
+                **self.llm_cache_stats,
+                "size": len(self.llm_cache),
+                "maxsize": self.llm_cache.maxsize
+            },
+            "product_cache": {"size": len(self.product_cache), "maxsize": self.product_cache.maxsize},
+            "category_cache": {"size": len(self.category_cache), "maxsize": self.category_cache.maxsize},
+            "semantic_cache": {"size": len(self.semantic_cache.exact_cache), "maxsize": self.semantic_cache.exact_cache.maxsize}
+        }
+
+    def _response_cache_key(self, llm, prompt: str, **kwargs):
+        """Persistent cache key for a prompt, or None when the cache is off or the completion is not deterministic"""
+        if self.response_cache is None or llm.temperature > 0:
+            return None
+        return prompt_cache_key(llm, prompt, **kwargs)
+
+    async def _ainvoke(self, llm, prompt, cacheable=None, **kwargs):
         """
-        Fully async product matching with parallel processing and STRICT relevance
+        Invoke an LLM without exceeding MAX_CONCURRENT_LLM_CALLS in-flight requests, answering repeat prompts from the persistent cache.
+        cacheable decides from the response text whether it is worth persisting.
+        """
+        cache_key = self._response_cache_key(llm, prompt, **kwargs)
+        if cache_key:
+            cached = await self.response_cache.aget(cache_key)
+            if cached is not None:
+                return AIMessage(content=cached)
+        async with self.llm_semaphore:
+            response = await llm.ainvoke(prompt, **kwargs)
+        if cache_key and (cacheable is None or cacheable(response.content)):
+            await self.response_cache.aset(cache_key, response.content)
+        return response
+
+    async def generate_ingredients_and_match_products_async(self, user_query: str, store_id: str, with_metadata: bool = False):
+        """
+        Fully async product matching with parallel processing and STRICT relevance.
+        with_metadata also returns the query metadata, inferred in the same LLM call as the ingredients
         """
         start_time = time.time()
-        logger.info(f"Starting ASYNC processing: '{user_query[:50]}...' for store: {store_id}")
+        logger.info("Starting ASYNC processing: '%.50s...' for store: %s", user_query, store_id)
         
-        async def get_categories_async():
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(self.executor, get_categories_by_store, store_id)
-        
-        available_categories = await get_categories_async()
+        available_categories, category_index = await self._get_store_categories(store_id)
         
         if not available_categories:
-            logger.warning(f"No categories found for store: {store_id}")
+            logger.warning("No categories found for store: %s", store_id)
             return {"all_generated_categories": [], "matched_products": []}
         
         prep_time = time.time() - start_time
-        logger.info(f"Data preparation completed in {prep_time:.2f}s")
+        logger.info("Data preparation completed in %.2fs", prep_time)
         
         llm_start = time.time()
-        ingredients_data = await self._generate_ingredients_llm_async(user_query, available_categories)
-        logger.info(f"LLM ingredient generation finished {len(ingredients_data)} categories")
-        logger.info(f"LLM response: {ingredients_data}")
+        # Validation pairs from all categories share LLM batches
+        validation_batcher = _ValidationBatcher(self, user_query)
+        matching_tasks = []
+        dispatched = set()
+
+        def dispatch(category_data):
+            category_key = str(category_data.get("category", "")).strip().lower()
+            if category_key in dispatched:
+                return
+            dispatched.add(category_key)
+            matching_tasks.append(asyncio.create_task(
+                self._process_category_parallel(category_data, available_categories, store_id, user_query, category_index, validation_batcher)
+            ))
+
+        # Categories are dispatched for matching as soon as the stream completes each one
+        metadata = self._simple_query_metadata(user_query) if with_metadata else None
+        if with_metadata and metadata is None:
+            generated = await self._generate_ingredients_with_metadata_llm_async(user_query, available_categories, on_category=dispatch)
+            ingredients_data, metadata = generated["categories"], generated["metadata"]
+        else:
+            generated = await self._generate_ingredients_llm_async(user_query, available_categories, on_category=dispatch)
+            ingredients_data = generated["categories"]
+        logger.info("LLM ingredient generation finished %s categories", len(ingredients_data))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("LLM response: %s", ingredients_data)
         
         llm_time = time.time() - llm_start
-        logger.info(f"LLM ingredient generation completed in {llm_time:.2f}s")
+        logger.info("LLM ingredient generation completed in %.2fs (%s categories already dispatched)", llm_time, len(matching_tasks))
         
-        if not ingredients_data:
+        if not ingredients_data and not matching_tasks:
             logger.warning("No ingredients generated from LLM")
-            return {"all_generated_categories": [], "matched_products": []}
+            result = {"all_generated_categories": [], "matched_products": []}
+            if with_metadata:
+                result["metadata"] = metadata
+            return result
         
         matching_start = time.time()
-        matching_tasks = []
+        # Cache hits, coalesced calls and non-streamed fallbacks arrive in one piece; a semantic hit can also land
+        # after the racing stream dispatched some categories, so dispatch() skips the ones already running
         for category_data in ingredients_data:
-            task = asyncio.create_task(
-                self._process_category_parallel(category_data, available_categories, store_id, user_query)
-            )
-            matching_tasks.append(task)
+            dispatch(category_data)
         
         category_results = await asyncio.gather(*matching_tasks, return_exceptions=True)
         
         matching_time = time.time() - matching_start
-        logger.info(f"Parallel category matching completed in {matching_time:.2f}s")
+        logger.info("Parallel category matching completed in %.2fs", matching_time)
         
         all_generated_categories = []
         matched_products = []
         
         for i, result in enumerate(category_results):
             if isinstance(result, Exception):
-                logger.error(f"Error processing category {i}: {result}")
+                logger.error("Error processing category %s: %s", i, result)
                 continue
             
             if result and isinstance(result, dict):
@@ -116,14 +581,18 @@ class OptimizedCoreMatcher:
                     matched_products.append(result['matched_category'])
         
         total_time = time.time() - start_time
-        logger.info(f"ASYNC processing completed in {total_time:.2f}s - Generated: {len(all_generated_categories)}, Matched: {len(matched_products)}")
+        logger.info("ASYNC processing completed in %.2fs - Generated: %s, Matched: %s", total_time, len(all_generated_categories), len(matched_products))
         
-        return {
+        result = {
             "all_generated_categories": all_generated_categories,
             "matched_products": matched_products
         }
+        if with_metadata:
+            result["metadata"] = metadata
+        return result
 
-    async def _process_category_parallel(self, category_data: dict, available_categories: list, store_id: str, user_query: str):
+    async def _process_category_parallel(self, category_data: dict, available_categories: list, store_id: str, user_query: str,
+                                         category_index: dict = None, validation_batcher: _ValidationBatcher = None):
         """Process single category with strict filtering"""
         try:
             category_name = category_data.get("category", "").strip()
@@ -132,565 +601,619 @@ class OptimizedCoreMatcher:
             if not category_name or not items:
                 return None
             
-            category_info = self._find_matching_category(category_name, available_categories)
-            
-            generated_category = {
-                "category": {
-                    "_id": category_info["_id"] if category_info else "UNKNOWN",
-                    "categoryId": category_info.get("categoryId", "UNKNOWN") if category_info else "UNKNOWN",
-                    "name": category_info["name"] if category_info else category_name
-                },
-                "items": items
-            }
+            category_info = self._find_matching_category(category_name, available_categories, category_index)
             
             if not category_info:
-                logger.warning(f"Category '{category_name}' not found - skipping product matching")
-                return {"generated_category": generated_category, "matched_category": None}
+                logger.warning("Category '%s' not found - skipping product matching", category_name)
+                unknown_category = {"_id": "UNKNOWN", "categoryId": "UNKNOWN", "name": category_name}
+                return {"generated_category": {"category": unknown_category, "items": items}, "matched_category": None}
             
-            loop = asyncio.get_event_loop()
-            products = await loop.run_in_executor(
-                self.executor, 
-                get_optimized_products_for_matching, 
-                category_info['name'], 
-                store_id
-            )
+            # Same category dict for the generated and the matched entry
+            category = {
+                "_id": category_info["_id"],
+                "categoryId": category_info.get("categoryId", category_info["_id"]),
+                "name": category_info["name"]
+            }
+            generated_category = {"category": category, "items": items}
             
-            if not products:
-                logger.warning(f"No products found for category '{category_info['name']}'")
+            prepared_products = await self._get_prepared_products(category_info, store_id)
+            
+            if not prepared_products:
+                logger.warning("No products found for category '%s'", category_info['name'])
                 return {"generated_category": generated_category, "matched_category": None}
             
             matched_products = await self._strict_match_and_validate_products_async(
-                items, products, user_query, category_info['name']
+                items, prepared_products, user_query, category_info['name'], validation_batcher
             )
             
             if matched_products:
-                matched_category = {
-                    "category": {
-                        "_id": category_info["_id"],
-                        "categoryId": category_info.get("categoryId", category_info["_id"]),
-                        "name": category_info["name"]
-                    },
-                    "products": matched_products
-                }
+                matched_category = {"category": category, "products": matched_products}
                 return {"generated_category": generated_category, "matched_category": matched_category}
             
             return {"generated_category": generated_category, "matched_category": None}
             
         except Exception as e:
-            logger.error(f"Error in parallel category processing: {e}")
+            logger.error("Error in parallel category processing: %s", e)
             return None
 
-    async def _generate_ingredients_llm_async(self, user_query: str, available_categories: list):
-        """Async LLM generation with comprehensive supermarket coverage"""
-        try:
-            category_list = "\n".join([f'- {cat["name"]}' for cat in available_categories])
-            prompt = f'''You are a comprehensive SuperMarket expert with deep knowledge of ALL supermarket departments and items.
-
-                        User request: "{user_query}"
-
-                        Available Categories (ONLY use these exact names):
-                        {category_list}
+    async def _get_prepared_products(self, category_info: dict, store_id: str):
+        """Fetch a store category's products with their matching fields precomputed, cached per (store, category)"""
+        cache_key = (store_id, category_info['_id'])
+        prepared_products = self.product_cache.get(cache_key)
+        if prepared_products is not None:
+            return prepared_products
+        
+        products = await get_optimized_products_for_matching_async(
+            category_info['name'], 
+            store_id,
+            category_info['_id']
+        )
+        if not products:
+            return None
+        
+        loop = asyncio.get_event_loop()
+        async with self.match_semaphore:
+            prepared_products = await loop.run_in_executor(self.executor, self._prepare_products, products)
+        self.product_cache[cache_key] = prepared_products
+        return prepared_products
 
-                        COMPREHENSIVE ANALYSIS REQUIRED:
-                        - Consider the complete shopping experience for this request
-                        - Include preparation tools, storage items, supplies if relevant  
-                        - Think about complementary items and alternatives
-                        - Consider dietary restrictions, cultural preferences, seasonal availability
-                        - Include both essential and optional items for the best experience
-                        - Think about quantity, storage, and meal planning needs
+    def _prepare_products(self, products: list):
+        """Lowercased names and image filenames of the matchable products, computed once for every query"""
+        matchable, names_lower, filename_texts, filename_owners = [], [], [], []
+        for product in products:
+            if not isinstance(product, dict) or not product.get("ProductName"):
+                continue
+            product_name = str(product["ProductName"]).strip()
+            if not product_name:
+                continue
+            images = product.get("image", [])
+            if isinstance(images, list):
+                for url in images[:3]:
+                    filename = self._extract_filename_from_url(url) if isinstance(url, str) else ""
+                    if filename:
+                        filename_texts.append(filename)
+                        filename_owners.append(len(matchable))
+            matchable.append(product)
+            names_lower.append(product_name.lower())
+        return {
+            "products": matchable,
+            "names_lower": names_lower,
+            # Fixed-width string arrays so substring tests run as np.char operations
+            "names_array": np.array(names_lower, dtype=str),
+            "filename_texts": np.array(filename_texts, dtype=str),
+            "filename_owners": np.array(filename_owners, dtype=np.intp),
+        }
 
-                        Response format (JSON only):
-                        {{
-                        "categories": [
-                            {{
-                            "category": "<exact category name from list>",
-                            "items": ["essential_item1", "essential_item2", "optional_item3", "alternative_item4"]
-                            }}
-                        ]
-                        }}
+    async def _stream_categories_async(self, prompt: str, response_format: dict, on_category=None):
+        """
+        Stream a generation prompt, handing each completed category to on_category.
+        Returns (categories, raw response, ok); ok is False when every attempt was malformed and categories may be partial
+        """
+        cache_key = self._response_cache_key(self.llm, prompt, response_format=response_format)
+        if cache_key:
+            cached = await self.response_cache.aget(cache_key)
+            if cached is not None:
+                # Replay the stored response through the parser so on_category still fires per category
+                parser = _CategoryStreamParser()
+                categories = parser.feed(cached)
+                if on_category:
+                    for category_data in categories:
+                        on_category(category_data)
+                return categories, cached, True
 
-                        IMPORTANT: Use ONLY category names exactly as listed above. Consider ALL possible supermarket items that would enhance the user's experience.
-                        If user asked for a specific product (e.g., "olive oil"), include related items (e.g., "vinegar", "salad dressing") in the same or related categories.
-                        If user mentions a specific brand/product name (e.g., "Achi sambar masala"), include that EXACT product name in the relevant category.
-                        If user asked about dish or cooking items you only needs to show the related items not Household Cleaning or Baby Care unless he specifically asks for them.
-                        If user requests a dish (e.g., "biryani"), include all ingredients, spices, and accompaniments needed for that dish, Don't include unrelated items(eg. Tea, Coffee & Beverages or Some irrelvent mixs).
-                        Respond with ONLY the JSON structure above:'''
+        categories = []
+        for attempt in range(GENERATION_ATTEMPTS):
+            # Categories already handed out by an aborted attempt are not emitted twice
+            emitted = {str(category_data.get("category", "")).strip().lower() for category_data in categories}
+            parser = _CategoryStreamParser()
+            async with self.llm_semaphore:
+                stream = self.llm.astream(prompt if attempt == 0 else prompt + STRICT_JSON_REMINDER, response_format=response_format)
+                try:
+                    async for chunk in stream:
+                        for category_data in parser.feed(chunk.content):
+                            if str(category_data.get("category", "")).strip().lower() in emitted:
+                                continue
+                            categories.append(category_data)
+                            if on_category:
+                                on_category(category_data)
+                        if parser.malformed:
+                            # Stop paying for tokens of a response that is already broken
+                            break
+                finally:
+                    await stream.aclose()
+            if not parser.malformed:
+                break
+            logger.warning("Aborted malformed ingredient stream (attempt %s)", attempt + 1)
+        if cache_key and categories and not parser.malformed:
+            await self.response_cache.aset(cache_key, parser.text())
+        return categories, parser.text(), not parser.malformed
 
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(self.executor, self.llm.invoke, prompt)
+    @semantic_cache("generate", scope=_category_scope, cacheable=_is_complete_generation, threshold=GENERATION_SIMILARITY_THRESHOLD)
+    async def _generate_ingredients_llm_async(self, user_query: str, available_categories: list, on_category=None):
+        """
+        Async LLM generation with comprehensive supermarket coverage, streamed so on_category sees each category as soon as it is complete.
+        Returns {"categories", "complete"}; complete is False for partial or failed generations
+        """
+        try:
+            prompt = _ingredients_prompt(user_query, available_categories)
+            categories, response_text, complete = await self._stream_categories_async(
+                prompt, _ingredients_response_format(_category_names(available_categories)), on_category
+            )
             
-            result = self._extract_json_from_response(response.content)
+            if not categories:
+                # Nothing parsed incrementally - fall back to extracting JSON from the full response
+                result = self._extract_json_from_response(response_text)
+                
+                if not isinstance(result, dict) or "categories" not in result:
+                    logger.error("Invalid LLM response structure: %s", result)
+                    raise ValueError("Invalid response structure")
+                categories = result["categories"]
             
-            if not isinstance(result, dict) or "categories" not in result:
-                logger.error(f"Invalid LLM response structure: {result}")
-                raise ValueError("Invalid response structure")
+            logger.info("Generated %s comprehensive ingredient categories", len(categories))
+            return {"categories": categories, "complete": complete}
             
-            categories = result["categories"]
-            logger.info(f"Generated {len(categories)} comprehensive ingredient categories")
-            return categories
+        except Exception as e:
+            logger.error("Error in async ingredient generation: %s", e)
+            return {"categories": [], "complete": False}
+
+    @semantic_cache("generate_with_metadata", scope=_category_scope, cacheable=_is_complete_generation,
+                    threshold=GENERATION_SIMILARITY_THRESHOLD)
+    async def _generate_ingredients_with_metadata_llm_async(self, user_query: str, available_categories: list, on_category=None):
+        """Ingredient generation and metadata inference in a single streamed LLM call; returns {"categories", "metadata", "complete"}"""
+        categories = []
+        metadata = {}
+        complete = False
+        try:
+            prompt = _ingredients_prompt(user_query, available_categories) + INGREDIENTS_METADATA_SUFFIX
+            categories, response_text, complete = await self._stream_categories_async(
+                prompt, _ingredients_response_format(_category_names(available_categories), with_metadata=True), on_category
+            )
+            
+            result = self._extract_json_from_response(response_text)
+            if not isinstance(result, dict):
+                raise ValueError("Invalid response structure")
+            categories = categories or result.get("categories", [])
+            metadata = result.get("metadata") or {}
+            logger.info("Generated %s comprehensive ingredient categories with metadata", len(categories))
             
         except Exception as e:
-            logger.error(f"Error in async ingredient generation: {e}")
-            return []
+            logger.error("Error in async ingredient and metadata generation: %s", e)
+            complete = False
+        
+        return {"categories": categories, "metadata": _complete_metadata(metadata), "complete": complete}
 
-    async def _strict_match_and_validate_products_async(self, items: list, products: list, user_query: str, category_name: str):
+    async def _strict_match_and_validate_products_async(self, items: list, prepared_products: dict, user_query: str, category_name: str,
+                                                        validation_batcher: _ValidationBatcher = None):
         """
         STRICT RELEVANCE: Multi-stage filtering with balanced thresholds
         """
         try:
-            logger.info(f"Starting STRICT matching for {len(items)} items against {len(products)} products in '{category_name}'")
+            logger.info("Starting STRICT matching for %s items against %s products in '%s'", len(items), len(prepared_products["products"]), category_name)
             loop = asyncio.get_event_loop()
             
-            # STAGE 1: Fuzzy matching with BALANCED threshold (68%)
-            matching_tasks = []
-            for item in items:
-                task = loop.run_in_executor(
+            # STAGE 1: Fuzzy matching with BALANCED threshold (68%), all items in one batch
+            async with self.match_semaphore:
+                item_matches = await loop.run_in_executor(
                     self.executor,
-                    self._robust_fuzzy_match_single_item,
-                    item, products, 68  # BALANCED: 68% threshold (not too strict, not too loose)
+                    self._batch_fuzzy_match,
+                    items, prepared_products, 68  # BALANCED: 68% threshold (not too strict, not too loose)
                 )
-                matching_tasks.append(task)
-            
-            item_matches = await asyncio.gather(*matching_tasks)
             
             # STAGE 2: Collect top candidates with context-aware selection
-            all_matched_products = []
+            candidates = []
             used_product_ids = set()
-            
+
             for i, item in enumerate(items):
                 matches = item_matches[i]
-                # Take top 10 matches per item
-                for product, score in matches[:10]:
+                # Take top matches per item
+                for product, score in matches[:MAX_MATCHES_PER_ITEM]:
                     product_id = str(product["_id"])
                     if product_id not in used_product_ids:
-                        all_matched_products.append({
-                            "Product_id": product_id,
-                            "ProductName": product["ProductName"],
-                            "image": product.get("image", []),
-                            "mrpPrice": safe_float(product.get("mrpPrice"), 0.0),
-                            "offerPrice": safe_float(product.get("offerPrice"), 0.0),
-                            "quantity": 1,
-                            "match_score": score,
-                            "matched_item": item
-                        })
+                        candidates.append(_Candidate(product, item, score))
                         used_product_ids.add(product_id)
-            
-            if not all_matched_products:
+
+            if not candidates:
                 logger.warning("No products matched using fuzzy matching")
                 return []
-            
-            logger.info(f"Found {len(all_matched_products)} candidate products after fuzzy matching")
-            
-            # STAGE 3: STRICT LLM validation with context
-            validation_pairs = [
-                (p["matched_item"], p["ProductName"], p["match_score"]) 
-                for p in all_matched_products
-            ]
-            validation_results = await self._strict_llm_validation_async(
-                validation_pairs, user_query, category_name
-            )
-            
-            # STAGE 4: Final filtering
+
+            logger.info("Found %s candidate products after fuzzy matching", len(candidates))
+
+            # STAGE 3: STRICT LLM validation with context; products named exactly as the item are accepted outright
+            # and appliances/accessories rejected outright, only the ambiguous rest goes to the LLM
+            validation_results = {}
+            validation_pairs = []
+            for c in candidates:
+                product_name = c.product["ProductName"]
+                if is_accessory(c.item, product_name):
+                    validation_results[(c.item, product_name)] = False
+                elif c.score >= AUTO_ACCEPT_SCORE and _is_plain_item_name(c.item, product_name):
+                    validation_results[(c.item, product_name)] = True
+                else:
+                    validation_pairs.append((c.item, product_name, c.score))
+            if validation_results:
+                logger.info("Decided %s candidates without LLM validation", len(validation_results))
+            validation_results.update(await self._strict_llm_validation_async(
+                validation_pairs, user_query, category_name, validation_batcher
+            ))
+
+            # STAGE 4: Final filtering - response dicts are built only for accepted candidates
             final_products = []
             seen_products = set()
-            
-            for product_info in all_matched_products:
-                item = product_info["matched_item"]
-                product_name = product_info["ProductName"]
-                match_score = product_info["match_score"]
-                
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+            for candidate in candidates:
+                product = candidate.product
+                item = candidate.item
+                product_name = product["ProductName"]
+                match_score = candidate.score
+
                 is_valid = validation_results.get((item, product_name), False)
-                
+
                 # STRICT: Require BOTH LLM validation AND minimum score 68%
                 if is_valid and match_score >= 68 and product_name not in seen_products:
-                    final_product = {
-                        "Product_id": product_info["Product_id"],
+                    final_products.append({
+                        "Product_id": str(product["_id"]),
                         "ProductName": product_name,
-                        "image": product_info["image"],
-                        "mrpPrice": product_info["mrpPrice"],
-                        "offerPrice": product_info["offerPrice"],
+                        "image": product.get("image", []),
+                        "mrpPrice": safe_float(product.get("mrpPrice"), 0.0),
+                        "offerPrice": safe_float(product.get("offerPrice"), 0.0),
                         "quantity": 1
-                    }
-                    final_products.append(final_product)
+                    })
                     seen_products.add(product_name)
-                else:
+                elif debug_enabled:
                     if not is_valid:
-                        logger.debug(f"❌ Filtered: '{product_name}' (failed STRICT validation for '{item}')")
+                        logger.debug("❌ Filtered: '%s' (failed STRICT validation for '%s')", product_name, item)
                     elif match_score < 65:
-                        logger.debug(f"❌ Filtered: '{product_name}' (score {match_score} < 65%)")
+                        logger.debug("❌ Filtered: '%s' (score %s < 65%%)", product_name, match_score)
             
-            logger.info(f"✅ Final products after STRICT filtering: {len(final_products)}")
+            logger.info("✅ Final products after STRICT filtering: %s", len(final_products))
             return final_products
             
         except Exception as e:
-            logger.error(f"Error in strict match and validate: {e}")
+            logger.error("Error in strict match and validate: %s", e)
             return []
 
-    async def _strict_llm_validation_async(self, item_product_pairs: list, query_context: str, category_name: str):
+    async def _strict_llm_validation_async(self, item_product_pairs: list, query_context: str, category_name: str,
+                                           validation_batcher: _ValidationBatcher = None):
         """
-        STRICT BUT FAIR validation with context awareness
+        STRICT BUT FAIR validation with context awareness.
+        Uncached pairs go through validation_batcher, so they can share LLM calls with other categories
         """
         if not item_product_pairs or not self.validation_llm:
             return {}
         uncached_pairs = []
         results = {}
+        qc_key = query_context.lower()[:50]
         
-        with self.cache_lock:
-            for item, product_name, score in item_product_pairs:
-                cache_key = (item.lower(), product_name.lower(), query_context.lower()[:50])
-                if cache_key in self.llm_cache:
-                    results[(item, product_name)] = self.llm_cache[cache_key]
-                else:
-                    uncached_pairs.append((item, product_name, score))
+        for item, product_name, score in item_product_pairs:
+            cached = self.llm_cache.get((item.lower(), product_name.lower(), qc_key))
+            if cached is not None:
+                results[(item, product_name)] = cached[0]
+            else:
+                uncached_pairs.append((item, product_name, score))
+        # Second tier: decisions persisted by earlier processes, other workers or other instances
+        if uncached_pairs:
+            persisted = await self._load_validation_decisions_async([
+                _validation_cache_key(item, product_name, qc_key) for item, product_name, score in uncached_pairs
+            ])
+            if persisted:
+                still_uncached = []
+                for item, product_name, score in uncached_pairs:
+                    entry = persisted.get(_validation_cache_key(item, product_name, qc_key))
+                    if entry is None:
+                        still_uncached.append((item, product_name, score))
+                    else:
+                        decision, remaining = entry
+                        results[(item, product_name)] = decision == "1"
+                        self.llm_cache[(item.lower(), product_name.lower(), qc_key)] = (decision == "1", time.monotonic() + remaining)
+                uncached_pairs = still_uncached
+        self.llm_cache_stats["hits"] += len(results)
+        self.llm_cache_stats["misses"] += len(uncached_pairs)
         
         if not uncached_pairs:
             return results
         
-        # Process in batches
-        batch_size = 15  
-        batch_tasks = []
-        
-        for i in range(0, len(uncached_pairs), batch_size):
-            batch = uncached_pairs[i:i + batch_size]
-            task = self._process_strict_validation_batch_async(batch, query_context, category_name)
-            batch_tasks.append(task)
-        
-        batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+        # Process in batches; a standalone call sends its leftover batch straight away
+        if validation_batcher is None:
+            validation_batcher = _ValidationBatcher(self, query_context, window=0)
+        results.update(await validation_batcher.validate(uncached_pairs, category_name))
         
-        for batch_result in batch_results:
-            if isinstance(batch_result, dict):
-                results.update(batch_result)
-        
-        # Cache results
-        with self.cache_lock:
-            for item, product_name, score in uncached_pairs:
-                if (item, product_name) in results:
-                    cache_key = (item.lower(), product_name.lower(), query_context.lower()[:50])
-                    self.llm_cache[cache_key] = results[(item, product_name)]
+        # Cache results; undecided pairs (None, from a failed batch) are retried by the next request instead
+        persisted = {}
+        for item, product_name, score in uncached_pairs:
+            decision = results.get((item, product_name))
+            if decision is not None:
+                self.llm_cache[(item.lower(), product_name.lower(), qc_key)] = (decision, time.monotonic() + VALIDATION_CACHE_TTL)
+                persisted[_validation_cache_key(item, product_name, qc_key)] = "1" if decision else "0"
+        if persisted:
+            await self._save_validation_decisions_async(persisted)
         
         return results
 
-    async def _process_strict_validation_batch_async(self, batch_pairs: list, query_context: str, category_name: str):
+    async def _load_validation_decisions_async(self, keys: list):
+        """
+        Persisted decisions for keys as {key: ("1"/"0", seconds left)}: local SQLite first, then Redis,
+        whose hits are copied to SQLite with the lifetime they have left
+        """
+        found = await self.response_cache.aget_many(keys) if self.response_cache else {}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = await get_validation_decisions(missing)
+            if shared:
+                if self.response_cache:
+                    await self.response_cache.aset_many(
+                        {key: value for key, (value, remaining) in shared.items()},
+                        ttls={key: remaining for key, (value, remaining) in shared.items()}
+                    )
+                found.update(shared)
+        return found
+
+    async def _save_validation_decisions_async(self, decisions: dict):
+        """Write fresh "1"/"0" decisions through to SQLite and Redis"""
+        # Same lifetime as the in-memory tier
+        if self.response_cache:
+            await self.response_cache.aset_many(decisions, ttl=VALIDATION_CACHE_TTL)
+        await save_validation_decisions(decisions, VALIDATION_CACHE_TTL)
+
+    async def _process_strict_validation_batch_async(self, batch_pairs: list, query_context: str):
         """
-        STRICT BUT CONTEXT-AWARE validation prompt
+        STRICT BUT CONTEXT-AWARE validation prompt for (item, product_name, category_name) pairs.
+        Pairs the answer skips are left out of the result, as is the whole batch when the call fails, so they stay undecided
         """
         try:
-            prompt = f"""You are a STRICT product relevance validator for a grocery shopping assistant.
-            Based on the real world examples, determine if each product is RELEVANT (YES) or NOT RELEVANT (NO) to the user's query.
-
-            User Query: "{query_context}"
-            Category: "{category_name}"
-
-            **STRICT VALIDATION RULES:**
-
-            Answer YES if:
-            1. The product is an EXACT match for the requested item
-            2. The product is a direct brand/size variant (e.g., "Amul Ghee 1L" for "ghee")
-            3. The product serves the EXACT same purpose in the context of the user's query
-
-            Answer NO if:
-            1. Product is a TOOL/ACCESSORY when ingredient was requested (e.g., "Oil Dispenser" ≠ "oil")
-            2. Product is from WRONG cuisine/category (e.g., "Chinese Rice" ≠ "biryani rice")
-            3. Product is PROCESSED VERSION when raw item requested (e.g., "Ketchup" ≠ "tomato")
-            4. Product name contains keyword but serves DIFFERENT purpose (e.g., "Rice Cooker" ≠ "rice")
-            5. Product is tangentially related but NOT directly needed
-            6. You have ANY reasonable doubt about relevance
-
-            **EXAMPLES TO REJECT:**
-            - Request: "oil" → Product: "Oil Dispenser" → NO (it's a container)
-            - Request: "rice" → Product: "Rice Flour" → NO (flour, not rice grains)
-            - Request: "biryani rice" → Product: "Chinese Rice" → NO (wrong cuisine)
-            - Request: "tomato" → Product: "Tomato Sauce" → NO (processed, not fresh)
-            - Request: "cumin" → Product: "Cumin Powder Mix Masala" → NO (mix, not pure cumin)
-
-            **EXAMPLES TO ACCEPT:**
-            - Request: "ghee" → Product: "Amul Ghee 500ml" → YES (brand variant)
-            - Request: "biryani masala" → Product: "Annapoorna Biryani Masala" → YES (exact match)
-            - Request: "salt" → Product: "Tata Salt 1kg" → YES (brand variant)
-            - Request: "basmati rice" → Product: "India Gate Basmati Rice" → YES (exact match)
-
-            Validate each pair (STRICT format: 1:YES or 1:NO):
-            """
-            
-            for i, (item, product_name, score) in enumerate(batch_pairs, 1):
-                prompt += f"\n{i}. '{item}' → '{product_name}'"
-            
-            prompt += f"\n\nRespond ONLY in format: 1:YES, 2:NO, 3:YES, etc. (no explanations)"
+            # Same pairs, same prompt: arrival order must not defeat the persistent response cache
+            batch_pairs = sorted(batch_pairs, key=lambda pair: (pair[2], pair[0], pair[1]))
+            pair_lines = "\n".join(
+                f"{i}. [{category_name}] '{item}' → '{product_name}'"
+                for i, (item, product_name, category_name) in enumerate(batch_pairs, 1)
+            )
+            messages = [
+                SystemMessage(content=VALIDATION_SYSTEM_PROMPT),
+                HumanMessage(content=f'User Query: "{query_context}"\n\n{pair_lines}')
+            ]
             
-            loop = asyncio.get_event_loop()
-            resp = await loop.run_in_executor(self.executor, self.validation_llm.invoke, prompt)
+            # Only answers covering every pair are persisted, so a partial one is not replayed
+            resp = await self._ainvoke(
+                self.validation_llm, messages,
+                cacheable=lambda content: None not in _parse_validation_answer(content, len(batch_pairs))
+            )
             
             answer_text = resp.content if hasattr(resp, 'content') else str(resp)
-            results = {}
-            
-            # Parse response with strict defaults
-            for line in answer_text.replace('\n', ',').split(','):
-                if ':' in line:
-                    try:
-                        idx_str, decision = line.strip().split(':', 1)
-                        idx = int(idx_str) - 1
-                        if 0 <= idx < len(batch_pairs):
-                            item, product_name, score = batch_pairs[idx]
-                            is_valid = decision.strip().upper().startswith('YES')
-                            results[(item, product_name)] = is_valid
-                            
-                            if not is_valid:
-                                logger.debug(f"LLM REJECTED: '{item}' → '{product_name}'")
-                            else:
-                                logger.debug(f"LLM APPROVED: '{item}' → '{product_name}'")
-                    except (ValueError, IndexError):
-                        continue
+            decisions = _parse_validation_answer(answer_text, len(batch_pairs))
+            undecided = decisions.count(None)
+            if undecided:
+                logger.warning("Validation answer skipped %s of %s pairs - leaving them undecided", undecided, len(batch_pairs))
             
-            # Default to NO for any unparsed pairs (strict fallback)
-            for item, product_name, score in batch_pairs:
-                if (item, product_name) not in results:
-                    results[(item, product_name)] = False
-                    logger.debug(f"Default REJECTED: '{item}' → '{product_name}'")
+            results = {}
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            for (item, product_name, category_name), is_valid in zip(batch_pairs, decisions):
+                if is_valid is None:
+                    continue
+                results[(item, product_name)] = is_valid
+                
+                if debug_enabled:
+                    logger.debug("LLM %s: '%s' → '%s'", "APPROVED" if is_valid else "REJECTED", item, product_name)
             
             return results
             
         except Exception as e:
-            logger.error(f"Batch validation error: {e}")
-            return {(item, product_name): False for item, product_name, score in batch_pairs}
-
-    async def infer_metadata_async(self, user_query: str):
-        """Async metadata generation"""
-        try:
-            prompt = f'''Analyze and extract metadata from this query.
-
-            Query: "{user_query}"
+            logger.error("Batch validation error - leaving the batch undecided: %s", e)
+            return {}
 
-            Response format (JSON only):
-            {{
-            "dishbased": ["specific_dish_name"],
-            "cuisinebased": ["cuisine_type"],
-            "dietarypreferences": ["dietary_type"],
-            "timebased": ["meal_time"]
-            }}
+    def _simple_query_metadata(self, user_query: str):
+        """Metadata for empty, single-word and other trivial queries, or None when the LLM is needed"""
+        normalized_query = normalize_text(user_query)
+        metadata = SIMPLE_QUERY_METADATA.get(normalized_query)
+        if metadata is None and len(normalized_query.split()) < 2:
+            metadata = DEFAULT_METADATA
+        if metadata is None:
+            return None
+        logger.info("Metadata for trivial query '%.50s' resolved without LLM", user_query)
+        return {field: list(values) for field, values in metadata.items()}
 
-            Instructions:
-            - dishbased: Main dish/recipe mentioned (e.g., "biryani", "pasta", "salad")
-            - cuisinebased: Cuisine type (e.g., "Indian", "Italian", "Chinese", "International")
-            - dietarypreferences: Diet type (e.g., "Vegetarian", "Non-Vegetarian", "Vegan", "Mixed")
-            - timebased: Meal timing (e.g., "breakfast", "lunch", "dinner", "snack", "general")
+    async def _get_store_categories(self, store_id: str):
+        """A store's categories and their lookup index, cached per store"""
+        cached = self.category_cache.get(store_id)
+        if cached is not None:
+            return cached
+        
+        available_categories = await get_categories_by_store_async(store_id)
+        if not available_categories:
+            return [], None
+        
+        cached = (available_categories, self._build_category_index(available_categories))
+        self.category_cache[store_id] = cached
+        return cached
 
-            Provide exactly one relevant value for each field.
-            Respond with ONLY the JSON:'''
-            
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(self.executor, self.llm.invoke, prompt)
-            
-            result = self._extract_json_from_response(response.content)
-            
-            return {
-                "dishbased": result.get("dishbased", ["general"]),
-                "cuisinebased": result.get("cuisinebased", ["international"]),
-                "dietarypreferences": result.get("dietarypreferences", ["mixed"]),
-                "timebased": result.get("timebased", ["general"])
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in async metadata inference: {e}")
-            return {
-                "dishbased": ["general"],
-                "cuisinebased": ["international"],
-                "dietarypreferences": ["mixed"],
-                "timebased": ["general"]
-            }
+    def _build_category_index(self, available_categories: list):
+        """Precompute normalized category names once per store for _find_matching_category"""
+        canonical = {}
+        loose = {}
+        lowered = []
+        loose_keys = []
+        for cat in available_categories:
+            cat_name_lower = cat["name"].lower().strip()
+            canonical_key = _canonical_category_key(cat_name_lower)
+            loose_key = _loose_category_key(cat_name_lower)
+            canonical.setdefault(canonical_key, cat)
+            loose.setdefault(loose_key, cat)
+            lowered.append((cat_name_lower, cat))
+            loose_keys.append((loose_key, cat))
+        return {
+            "canonical": canonical,
+            "loose": loose,
+            "lowered": lowered,
+            "loose_keys": loose_keys,
+            "names": [name for name, _ in lowered]
+        }
 
-    def _find_matching_category(self, category_name: str, available_categories: list):
+    def _find_matching_category(self, category_name: str, available_categories: list, category_index: dict = None):
         """Find matching category with improved fuzzy matching"""
         if not category_name or not available_categories:
             return None
         
+        if category_index is None:
+            category_index = self._build_category_index(available_categories)
+        
         category_name_lower = category_name.lower().strip()
         
-        # Exact match
-        for cat in available_categories:
-            if cat["name"].lower().strip() == category_name_lower:
-                return cat
+        # Exact match on the normalized name (spacing and "&"/"and" insensitive), then ignoring plurals
+        canonical_key = _canonical_category_key(category_name_lower)
+        cat = category_index["canonical"].get(canonical_key)
+        if cat:
+            return cat
+        loose_key = _loose_category_key(category_name_lower)
+        cat = category_index["loose"].get(loose_key)
+        if cat:
+            return cat
         
-        # Substring match
-        for cat in available_categories:
-            cat_name_lower = cat["name"].lower().strip()
-            if category_name_lower in cat_name_lower or cat_name_lower in category_name_lower:
-                return cat
-
-        # Variations
-        variations = [
-            category_name_lower,
-            category_name_lower.replace(" ", ""),
-            category_name_lower.replace("&", "and"),
-            category_name_lower.replace("and", "&"),
-            category_name_lower.replace("s", "").rstrip(),
-        ]
+        # Substring match, then substring match on the loose keys (spacing/punctuation/plural insensitive)
+        cat = _closest_containing(category_name_lower, category_index["lowered"]) or _closest_containing(loose_key, category_index["loose_keys"])
+        if cat:
+            return cat
         
-        for cat in available_categories:
-            cat_name_lower = cat["name"].lower().strip()
-            for variation in variations:
-                if variation in cat_name_lower or cat_name_lower in variation:
-                    return cat
+        # Last resort: one C-level fuzzy pass for misspelled or reworded names
+        best = process.extractOne(category_name_lower, category_index["names"], scorer=fuzz.WRatio, score_cutoff=CATEGORY_FUZZY_CUTOFF)
+        if best:
+            logger.info("Fuzzy category match '%s' -> '%s' (score %.1f)", category_name, best[0], best[1])
+            return category_index["lowered"][best[2]][1]
         
-        logger.warning(f"No matching category found for '{category_name}'")
+        logger.warning("No matching category found for '%s'", category_name)
         return None
 
     def _extract_json_from_response(self, response_content: str):
         """Extract JSON from LLM response content"""
         try:
             cleaned_content = response_content.strip()
-            if cleaned_content.startswith('```json'):
-                cleaned_content = cleaned_content[7:]
-            elif cleaned_content.startswith('```'):
-                cleaned_content = cleaned_content[3:]
-            if cleaned_content.endswith('```'):
-                cleaned_content = cleaned_content[:-3]
-            cleaned_content = cleaned_content.strip()
-            
-            json_pattern = r'\{.*\}'
-            match = re.search(json_pattern, cleaned_content, re.DOTALL)
+            # JSON mode responses are a bare object - parse directly
+            if cleaned_content.startswith('{'):
+                try:
+                    return orjson.loads(cleaned_content)
+                except orjson.JSONDecodeError:
+                    pass
+            cleaned_content = cleaned_content.removeprefix('```json').removeprefix('```').removesuffix('```').strip()
             
-            if match:
-                return json.loads(match.group(0))
-            return json.loads(cleaned_content)
+            # Decode the first object in one pass, ignoring any prose before or after it
+            start = cleaned_content.find('{')
+            if start != -1:
+                return _JSON_DECODER.raw_decode(cleaned_content, start)[0]
+            return orjson.loads(cleaned_content)
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decoding failed: {e}")
+            logger.error("JSON decoding failed: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Error extracting JSON: {e}")
+            logger.error("Error extracting JSON: %s", e)
             raise
 
     def _extract_filename_from_url(self, url: str):
         """Extract filename from image URL for matching"""
-        try:
-            if not url or not isinstance(url, str):
-                return ""
-
-            parsed_url = urllib.parse.urlparse(url)
-            filename = os.path.basename(parsed_url.path)
-            filename_without_ext = os.path.splitext(filename)[0]
-            clean_filename = filename_without_ext.replace('-', ' ').replace('_', ' ').replace('.', ' ')
-            clean_filename = ' '.join(clean_filename.split()) 
-            
-            return clean_filename.lower()
-            
-        except Exception as e:
-            logger.debug(f"Error extracting filename from URL {url}: {e}")
+        if not url or not isinstance(url, str):
             return ""
 
-    def _robust_fuzzy_match_single_item(self, item: str, products: list, threshold: int = 65):
+        # Plain string splits instead of urlparse: drop fragment and query, then scheme and host
+        path = url.split('#', 1)[0].split('?', 1)[0]
+        if '://' in path:
+            path = path.split('://', 1)[1].partition('/')[2]
+        filename = path.rsplit('/', 1)[-1].split(';', 1)[0]
+        clean_filename = os.path.splitext(filename)[0].translate(_FILENAME_SEPARATORS)
+        return ' '.join(clean_filename.split()).lower()
+
+    def _batch_fuzzy_match(self, items: list, prepared_products: dict, threshold: int = 65):
         """
-        BALANCED fuzzy matching with intelligent scoring
+        BALANCED fuzzy matching with intelligent scoring, for all items in one pass.
+        Fuzzy scores come from a single rapidfuzz cdist per scorer instead of
+        per-(item, product) calls; prepared_products comes from _prepare_products.
         """
         try:
-            if not item or not products:
-                return []
-            
-            item_clean = item.strip().lower()
-            
-            # Remove "optional:" prefix if present
-            if item_clean.startswith("optional:"):
-                item_clean = item_clean.replace("optional:", "").strip()
-            
-            item_words = [w for w in item_clean.split() if len(w) > 2]
-            matches = []
-            
+            products = prepared_products["products"]
+            names_lower = prepared_products["names_lower"]
+            names_array = prepared_products["names_array"]
+            filename_texts = prepared_products["filename_texts"]
+            filename_owners = prepared_products["filename_owners"]
+
+            items_clean = []
+            for item in items:
+                item_clean = (item or "").strip().lower()
+                # Remove "optional:" prefix if present
+                if item_clean.startswith("optional:"):
+                    item_clean = item_clean.replace("optional:", "").strip()
+                items_clean.append(item_clean)
+
+            if not names_lower:
+                return [[] for _ in items]
+
+            # TIER 4 scores for every (item, product) pair; below-threshold scores come back as 0
+            fuzzy_scores = process.cdist(items_clean, names_lower, scorer=fuzz.token_sort_ratio,
+                                         score_cutoff=threshold, dtype=np.float32, workers=-1)
+            np.maximum(fuzzy_scores, process.cdist(items_clean, names_lower, scorer=fuzz.partial_ratio,
+                                                   score_cutoff=threshold, dtype=np.float32, workers=-1), out=fuzzy_scores)
+            np.maximum(fuzzy_scores, process.cdist(items_clean, names_lower, scorer=fuzz.token_set_ratio,
+                                                   score_cutoff=threshold, dtype=np.float32, workers=-1), out=fuzzy_scores)
+
             # Filter out generic words
             generic_words = {'the', 'and', 'for', 'with', 'from', 'pack', 'box', 'bottle', 'jar', 'can', 'optional'}
-            significant_words = [w for w in item_words if w not in generic_words]
-            
-            for i, product in enumerate(products):
-                try:
-                    if not isinstance(product, dict) or not product.get("ProductName"):
-                        continue
-                    
-                    product_name = str(product["ProductName"]).strip()
-                    if not product_name:
-                        continue
-                    
-                    product_name_lower = product_name.lower()
-                    product_words = [w for w in product_name_lower.split() if len(w) > 2]
-                    
-                    max_score = 0
-                    match_source = "none"
-                    
-                    # TIER 1: Exact substring match (100 points)
-                    if item_clean in product_name_lower:
-                        max_score = 100
-                        match_source = "exact_substring"
-                    
-                    # TIER 2: All significant words present (95 points)
-                    elif significant_words and all(word in product_name_lower for word in significant_words):
-                        max_score = 95
-                        match_source = "all_words"
-                    
-                    # TIER 3: Multiple word match with ratio (75-90 points)
-                    elif significant_words:
-                        word_count = sum(1 for word in significant_words if word in product_name_lower)
-                        if word_count > 0:
-                            word_ratio = word_count / len(significant_words)
-                            if word_ratio >= 0.5:  # At least 50% of words
-                                score = int(75 + (word_ratio * 20))
-                                if score > max_score:
-                                    max_score = score
-                                    match_source = "multi_word"
-                    
-                    # TIER 4: Advanced fuzzy matching (up to 90 points)
-                    if max_score < 85:
-                        try:
-                            token_score = fuzz.token_sort_ratio(item_clean, product_name_lower)
-                            partial_score = fuzz.partial_ratio(item_clean, product_name_lower)
-                            token_set_score = fuzz.token_set_ratio(item_clean, product_name_lower)
-                            
-                            fuzzy_score = max(token_score, partial_score, token_set_score)
-                            
-                            if fuzzy_score > max_score and fuzzy_score >= threshold:
-                                max_score = fuzzy_score
-                                match_source = "fuzzy"
-                        except Exception:
-                            pass
-                    
-                    # TIER 5: Image filename matching (fallback, 85 points max)
-                    if max_score < 90:
-                        images = product.get("image", [])
-                        if isinstance(images, list) and images:
-                            for image_url in images[:3]:
-                                if isinstance(image_url, str):
-                                    filename = self._extract_filename_from_url(image_url)
-                                    if filename:
-                                        if item_clean in filename:
-                                            image_score = 85
-                                            if image_score > max_score:
-                                                max_score = image_score
-                                                match_source = "image"
-                                                break
-                    
-                    # Only add if meets threshold
-                    if max_score >= threshold:
-                        matches.append({
-                            'product': product,
-                            'score': max_score,
-                            'source': match_source,
-                            'index': i
-                        })
-                
-                except Exception as product_error:
-                    logger.debug(f"Error processing product {i}: {product_error}")
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            results = []
+
+            for row, (item, item_clean) in enumerate(zip(items, items_clean)):
+                if not item_clean:
+                    results.append([])
                     continue
-            
-            # Sort by score (descending), then by original index
-            matches.sort(key=lambda x: (-x['score'], x['index']))
-            
-            # Return top 10 matches per item
-            result = [(match['product'], match['score']) for match in matches[:10]]
-            
-            if result:
-                logger.debug(f"Item '{item}': {len(result)} matches, top score: {result[0][1]} ({matches[0]['source']})")
-            
-            return result
-            
+                significant_words = [w for w in item_clean.split() if len(w) > 2 and w not in generic_words]
+
+                # TIER 1: Exact substring match (100 points)
+                exact = np.char.find(names_array, item_clean) >= 0
+
+                # TIER 2: All significant words present (95 points)
+                # TIER 3: Multiple word match with ratio (75-90 points), at least 50% of words
+                if significant_words:
+                    word_counts = np.sum([np.char.find(names_array, word) >= 0 for word in significant_words], axis=0)
+                    word_ratio = word_counts / len(significant_words)
+                    word_scores = np.where(word_ratio >= 0.5, np.floor(75 + word_ratio * 20), 0.0)
+                else:
+                    word_scores = np.zeros(len(names_lower))
+                scores = np.where(exact, 100.0, word_scores)
+
+                # TIER 4: Advanced fuzzy matching (up to 90 points)
+                row_scores = fuzzy_scores[row].astype(np.float64)
+                scores = np.where((scores < 85) & (row_scores > scores), row_scores, scores)
+
+                # TIER 5: Image filename matching (fallback, 85 points max)
+                if filename_texts.size:
+                    image_hits = np.zeros(len(names_lower), dtype=bool)
+                    image_hits[filename_owners[np.char.find(filename_texts, item_clean) >= 0]] = True
+                    scores = np.where((scores < 85) & image_hits, 85.0, scores)
+
+                # Only keep those meeting threshold
+                candidates = np.flatnonzero(scores >= threshold)
+                if len(candidates) > MAX_MATCHES_PER_ITEM:
+                    # Partial selection: only candidates tying or beating the K-th best score get sorted
+                    kth_score = np.partition(scores[candidates], -MAX_MATCHES_PER_ITEM)[-MAX_MATCHES_PER_ITEM]
+                    candidates = candidates[scores[candidates] >= kth_score]
+
+                # Top matches per item, by score (descending), then by original index
+                ranked = candidates[np.lexsort((candidates, -scores[candidates]))][:MAX_MATCHES_PER_ITEM]
+                result = [(products[index], float(scores[index])) for index in ranked]
+                if result and debug_enabled:
+                    top = ranked[0]
+                    if exact[top]:
+                        match_source = "exact_substring"
+                    elif word_scores[top] and scores[top] == word_scores[top]:
+                        match_source = "all_words" if word_scores[top] == 95 else "multi_word"
+                    elif scores[top] == row_scores[top]:
+                        match_source = "fuzzy"
+                    else:
+                        match_source = "image"
+                    logger.debug("Item '%s': %s matches, top score: %s (%s)", item, len(result), result[0][1], match_source)
+                results.append(result)
+
+            return results
+
         except Exception as e:
-            logger.error(f"Error in fuzzy matching for item '{item}': {e}")
-            return []
+            logger.error("Error in batch fuzzy matching for %s items: %s", len(items), e)
+            return [[] for _ in items]
 
-# Global optimized instance
-core_matcher = OptimizedCoreMatcher()
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_core_matcher() -> OptimizedCoreMatcher:
+    """Shared matcher instance, created on first use rather than at import"""
+    return OptimizedCoreMatcher()
@@ -1,7 +1,11 @@
 import logging
 from pymongo import MongoClient
 from bson.objectid import ObjectId
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -14,18 +18,46 @@ if not MONGO_URI:
 if not DB_NAME:
     raise ValueError("MONGODB_NAME not found in file")
 
-logger.info(f"Using MONGO_URI: {MONGO_URI}")
-logger.info(f"Using DB_NAME: {DB_NAME}")
+logger.info("Using MONGO_URI: %s", MONGO_URI)
+logger.info("Using DB_NAME: %s", DB_NAME)
+
+MONGO_MAX_POOL_SIZE = 50
 
 try:
-    client = MongoClient(MONGO_URI)
+    client = MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE)
     db = client[DB_NAME]
     client.admin.command('ping')
-    logger.info(f"Successfully connected to MongoDB: {DB_NAME}")
+    logger.info("Successfully connected to MongoDB: %s", DB_NAME)
 except Exception as e:
-    logger.error(f"Failed to connect to MongoDB: {e}")
+    logger.error("Failed to connect to MongoDB: %s", e)
     raise
 
+CATALOG_CACHE_TTL = 300
+STORE_CACHE_TTL = 60
+
+_categories_cache = TTLCache(maxsize=1, ttl=CATALOG_CACHE_TTL)
+_sellers_cache = TTLCache(maxsize=1, ttl=CATALOG_CACHE_TTL)
+_store_cache = TTLCache(maxsize=1024, ttl=STORE_CACHE_TTL)
+_cache_lock = threading.Lock()
+# Blocking driver calls run here, one thread per pooled connection, so they neither stall
+# the event loop nor queue behind CPU-bound matching work
+_db_executor = ThreadPoolExecutor(max_workers=MONGO_MAX_POOL_SIZE, thread_name_prefix="mongo")
+
+async def _run_db(func, *args):
+    """Await a blocking database function on the dedicated MongoDB thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, func, *args)
+
+def _get_cached(cache: TTLCache, key, loader, *args):
+    """Serve loader(*args) from a TTL cache, caching only non-empty results"""
+    with _cache_lock:
+        if key in cache:
+            return cache[key]
+    value = loader(*args)
+    if value:
+        with _cache_lock:
+            cache[key] = value
+    return value
+
 def get_all_categories():
     """Fetch all categories with _id, categoryId and name"""
     try:
@@ -37,10 +69,10 @@ def get_all_categories():
                 "categoryId": str(cat["_id"]), 
                 "name": cat["name"]
             })
-        logger.info(f"Retrieved {len(result)} categories from MongoDB")
+        logger.info("Retrieved %s categories from MongoDB", len(result))
         return result
     except Exception as e:
-        logger.error(f"Error fetching categories: {e}")
+        logger.error("Error fetching categories: %s", e)
         return []
 
 def get_all_sellers():
@@ -69,10 +101,10 @@ def get_all_sellers():
                 "isActive": seller.get("isActive", False)
             })
         
-        logger.info(f"Retrieved {len(result)} sellers from MongoDB")
+        logger.info("Retrieved %s sellers from MongoDB", len(result))
         return result
     except Exception as e:
-        logger.error(f"Error fetching sellers: {e}")
+        logger.error("Error fetching sellers: %s", e)
         return []
 
 def get_categories_by_store(store_id: str):
@@ -82,7 +114,7 @@ def get_categories_by_store(store_id: str):
         category_oids = db.products.distinct("category", {"seller": store_oid})
         
         if not category_oids:
-            logger.warning(f"No categories found for store: {store_id}")
+            logger.warning("No categories found for store: %s", store_id)
             return []
         categories = list(db.categories.find(
             {"_id": {"$in": category_oids}}, 
@@ -97,24 +129,27 @@ def get_categories_by_store(store_id: str):
                 "name": cat["name"]
             })
         
-        logger.info(f"Retrieved {len(result)} categories for store {store_id}")
+        logger.info("Retrieved %s categories for store %s", len(result), store_id)
         return result
         
     except Exception as e:
-        logger.error(f"Error fetching categories for store {store_id}: {e}")
+        logger.error("Error fetching categories for store %s: %s", store_id, e)
         return []
 
-def get_optimized_products_for_matching(category_name: str, store_id: str):
-    """database query to fetch products for fuzzy matching"""
+def get_optimized_products_for_matching(category_name: str, store_id: str, category_id: str = None):
+    """database query to fetch products for fuzzy matching; pass category_id to skip the category lookup by name"""
     try:
         store_oid = ObjectId(store_id)
-        category = db.categories.find_one({"name": category_name})
-        if not category:
-            logger.warning(f"Category '{category_name}' not found")
-            return []
-        
-        category_oid = category["_id"]
-        logger.info(f"Found category '{category_name}' with ID: {category_oid}")
+        if category_id:
+            category_oid = ObjectId(category_id)
+        else:
+            category = db.categories.find_one({"name": category_name})
+            if not category:
+                logger.warning("Category '%s' not found", category_name)
+                return []
+            
+            category_oid = category["_id"]
+            logger.info("Found category '%s' with ID: %s", category_name, category_oid)
         products = list(db.products.find({
             "category": category_oid,
             "seller": store_oid,
@@ -147,13 +182,21 @@ def get_optimized_products_for_matching(category_name: str, store_id: str):
                 }
                 filtered_products.append(product)
         
-        logger.info(f"Retrieved {len(filtered_products)} valid products for category '{category_name}' and store {store_id}")
+        logger.info("Retrieved %s valid products for category '%s' and store %s", len(filtered_products), category_name, store_id)
         return filtered_products
         
     except Exception as e:
-        logger.error(f"Error fetching optimized products for category {category_name} and store {store_id}: {e}")
+        logger.error("Error fetching optimized products for category %s and store %s: %s", category_name, store_id, e)
         return []
 
+async def get_categories_by_store_async(store_id: str):
+    """Awaitable get_categories_by_store"""
+    return await _run_db(get_categories_by_store, store_id)
+
+async def get_optimized_products_for_matching_async(category_name: str, store_id: str, category_id: str = None):
+    """Awaitable get_optimized_products_for_matching"""
+    return await _run_db(get_optimized_products_for_matching, category_name, store_id, category_id)
+
 def get_products_by_category_and_store(category_name: str, store_id: str):
     """Legacy function"""
     return get_optimized_products_for_matching(category_name, store_id)
@@ -176,24 +219,36 @@ def get_store_by_id(store_id: str):
                 "isActive": store.get("isActive", False)
             }
         else:
-            logger.warning(f"Store not found: {store_id}")
+            logger.warning("Store not found: %s", store_id)
             return None
             
     except Exception as e:
-        logger.error(f"Error fetching store {store_id}: {e}")
+        logger.error("Error fetching store %s: %s", store_id, e)
         return None
 
+def get_all_categories_cached():
+    """Fetch all categories, served from a short-lived in-process cache"""
+    return _get_cached(_categories_cache, "all", get_all_categories)
+
+def get_all_sellers_cached():
+    """Fetch all sellers, served from a short-lived in-process cache"""
+    return _get_cached(_sellers_cache, "all", get_all_sellers)
+
+def get_store_by_id_cached(store_id: str):
+    """Fetch store details by ID, served from a short-lived in-process cache"""
+    return _get_cached(_store_cache, store_id, get_store_by_id, store_id)
+
 def test_connection():
     """Test database connection and basic queries"""
     try:
         categories_count = db.categories.count_documents({})
-        logger.info(f"Categories collection has {categories_count} documents")
+        logger.info("Categories collection has %s documents", categories_count)
         products_count = db.products.count_documents({})
-        logger.info(f"Products collection has {products_count} documents")
+        logger.info("Products collection has %s documents", products_count)
         sellers_count = db.sellers.count_documents({})
-        logger.info(f"Sellers collection has {sellers_count} documents")
+        logger.info("Sellers collection has %s documents", sellers_count)
         
         return True
     except Exception as e:
-        logger.error(f"Database connection test failed: {e}")
+        logger.error("Database connection test failed: %s", e)
         return False
@@ -0,0 +1,317 @@
+import logging
+import asyncio
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import orjson
+from cachetools import LRUCache, TTLCache
+from app.utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_SIMILARITY_THRESHOLD = 0.85
+CACHE_TTL_SECONDS = 3600
+MAX_CACHE_ENTRIES = 4096
+PERSISTENT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+PERSISTENT_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+# Keys per SELECT in get_many, below SQLite's bound-parameter limit
+PERSISTENT_CACHE_QUERY_CHUNK = 500
+# Expired rows are deleted by the first write after this many seconds, so long-lived workers do not grow the file
+PERSISTENT_CACHE_PRUNE_INTERVAL = 600
+
+def _message_parts(message):
+    """Serializable (role, content) form of a chat message"""
+    return [message.type, message.content]
+
+def prompt_cache_key(llm, prompt, **kwargs) -> str:
+    """SHA-256 of everything that determines a deterministic completion: model, sampling settings and prompt (text or messages)"""
+    payload = {
+        "m": llm.model_name,
+        "t": llm.temperature,
+        "k": {**llm.model_kwargs, **kwargs},
+        "p": prompt,
+    }
+    return hashlib.sha256(orjson.dumps(payload, default=_message_parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+class PersistentCache:
+    """
+    Disk-backed LLM response cache shared by all workers and surviving restarts (SQLite in WAL mode).
+    Coroutines use the a* methods, which run the blocking SQLite calls on the cache's own thread.
+    """
+
+    def __init__(self, path: str = PERSISTENT_CACHE_PATH, ttl: int = PERSISTENT_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self.conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+        self.last_pruned = time.monotonic()
+        logger.info("PersistentCache initialized at %s (ttl=%ss)", path, ttl)
+
+    def get(self, key: str):
+        """Return the cached value for key, or None when missing or expired"""
+        try:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Error reading persistent LLM cache: %s", e)
+            return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: int = None):
+        """Store value under key for ttl seconds (defaults to the cache TTL)"""
+        expires_at = time.time() + (ttl or self.ttl)
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+                )
+                self._prune_if_due()
+        except sqlite3.Error as e:
+            logger.error("Error writing persistent LLM cache: %s", e)
+
+    def get_many(self, keys: list):
+        """Return {key: (value, remaining lifetime in seconds)} for the keys that are cached and not expired"""
+        found = {}
+        now = time.time()
+        try:
+            with self.lock:
+                for start in range(0, len(keys), PERSISTENT_CACHE_QUERY_CHUNK):
+                    chunk = keys[start:start + PERSISTENT_CACHE_QUERY_CHUNK]
+                    for key, value, expires_at in self.conn.execute(
+                        f"SELECT key, value, expires_at FROM llm_cache WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at >= ?",
+                        (*chunk, now)
+                    ):
+                        found[key] = (value, expires_at - now)
+        except sqlite3.Error as e:
+            logger.error("Error reading persistent LLM cache: %s", e)
+        return found
+
+    def set_many(self, entries: dict, ttl: int = None, ttls: dict = None):
+        """Store every key -> value in entries for ttl seconds (or its own lifetime from ttls), in a single transaction"""
+        now = time.time()
+        ttl = ttl or self.ttl
+        ttls = ttls or {}
+        try:
+            with self.lock:
+                self.conn.execute("BEGIN")
+                try:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        [(key, value, now + ttls.get(key, ttl)) for key, value in entries.items()]
+                    )
+                except sqlite3.Error:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                self.conn.execute("COMMIT")
+                self._prune_if_due()
+        except sqlite3.Error as e:
+            logger.error("Error writing persistent LLM cache: %s", e)
+
+    def _prune_if_due(self):
+        """Delete expired rows at most once per PERSISTENT_CACHE_PRUNE_INTERVAL; caller holds the lock"""
+        if time.monotonic() - self.last_pruned < PERSISTENT_CACHE_PRUNE_INTERVAL:
+            return
+        self.last_pruned = time.monotonic()
+        deleted = self.conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),)).rowcount
+        if deleted:
+            logger.info("Pruned %s expired persistent LLM cache entries", deleted)
+
+    def close(self):
+        """Finish pending writes and close the database"""
+        self.executor.shutdown(wait=True)
+        self.conn.close()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def aget(self, key: str):
+        """get() without blocking the event loop"""
+        return await self._run(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: int = None):
+        """set() without blocking the event loop"""
+        await self._run(self.set, key, value, ttl)
+
+    async def aget_many(self, keys: list):
+        """get_many() without blocking the event loop"""
+        return await self._run(self.get_many, keys)
+
+    async def aset_many(self, entries: dict, ttl: int = None, ttls: dict = None):
+        """set_many() without blocking the event loop"""
+        await self._run(self.set_many, entries, ttl, ttls)
+
+def open_persistent_cache():
+    """Open the configured persistent cache, or return None when disabled (empty LLM_CACHE_PATH) or unavailable"""
+    if not PERSISTENT_CACHE_PATH:
+        return None
+    try:
+        return PersistentCache()
+    except sqlite3.Error as e:
+        logger.error("Persistent LLM cache unavailable, continuing without it: %s", e)
+        return None
+
+class SemanticCache:
+    """Two-tier LLM response cache: exact query hits, then nearest-neighbour search over query embeddings"""
+
+    def __init__(self, embeddings=None, threshold: float = SEMANTIC_SIMILARITY_THRESHOLD,
+                 ttl: int = CACHE_TTL_SECONDS, max_entries: int = MAX_CACHE_ENTRIES):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.exact_cache = TTLCache(maxsize=max_entries, ttl=ttl)
+        # (namespace, scope) -> (unit-vector matrix, payloads, insertion times), oldest rows first
+        self.vector_store = {}
+        self.embedding_cache = LRUCache(maxsize=max_entries)
+        self.inflight = {}
+        self.lock = threading.Lock()
+        logger.info("SemanticCache initialized (semantic tier %s, threshold=%s)", 'enabled' if embeddings else 'disabled', threshold)
+
+    async def _embed(self, normalized_query: str):
+        """Embed a normalized query as a unit vector, reusing embeddings across namespaces"""
+        with self.lock:
+            vector = self.embedding_cache.get(normalized_query)
+        if vector is not None:
+            return vector
+
+        raw = await self.embeddings.aembed_query(normalized_query)
+        vector = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        with self.lock:
+            self.embedding_cache[normalized_query] = vector
+        return vector
+
+    def lookup_exact(self, namespace: str, scope: str, query: str):
+        """Return the payload cached for the normalized query, or None on miss"""
+        exact_key = (namespace, scope, normalize_text(query))
+        with self.lock:
+            if exact_key in self.exact_cache:
+                logger.info("Semantic cache exact hit [%s]: '%.50s'", namespace, query)
+                return self.exact_cache[exact_key]
+        return None
+
+    async def lookup_similar(self, namespace: str, scope: str, query: str, threshold: float = None):
+        """Return the payload of the nearest cached query, or None on miss; threshold overrides the cache-wide similarity cutoff"""
+        if not self.embeddings:
+            return None
+
+        try:
+            vector = await self._embed(normalize_text(query))
+        except Exception as e:
+            logger.error("Error embedding query for semantic cache: %s", e)
+            return None
+
+        with self.lock:
+            entry = self.vector_store.get((namespace, scope))
+            if not entry:
+                return None
+            matrix, payloads, stored_at = entry
+            # Rows are in insertion order, so expired entries form a prefix
+            start = int(np.searchsorted(stored_at, time.monotonic() - self.ttl))
+            if start == len(payloads):
+                return None
+            similarities = matrix[start:] @ vector
+
+        best = int(np.argmax(similarities))
+        if similarities[best] >= (threshold or self.threshold):
+            logger.info("Semantic cache hit [%s]: '%.50s' (similarity %.3f)", namespace, query, similarities[best])
+            return payloads[start + best]
+        return None
+
+    async def store(self, namespace: str, scope: str, query: str, payload):
+        """Insert a payload into the exact tier and, when embeddings are available, the semantic tier"""
+        normalized_query = normalize_text(query)
+        with self.lock:
+            self.exact_cache[(namespace, scope, normalized_query)] = payload
+
+        if not self.embeddings:
+            return
+
+        try:
+            vector = await self._embed(normalized_query)
+        except Exception as e:
+            logger.error("Error embedding query for semantic cache: %s", e)
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            entry = self.vector_store.get((namespace, scope))
+            if entry:
+                matrix, payloads, stored_at = entry
+                # Drop expired rows and keep at most max_entries, newest last
+                start = int(np.searchsorted(stored_at, now - self.ttl))
+                start = max(start, len(payloads) + 1 - self.max_entries)
+                self.vector_store[(namespace, scope)] = (
+                    np.vstack([matrix[start:], vector]),
+                    payloads[start:] + [payload],
+                    np.append(stored_at[start:], now)
+                )
+            else:
+                self.vector_store[(namespace, scope)] = (vector.reshape(1, -1), [payload], np.array([now]))
+
+def semantic_cache(namespace: str, scope=None, cacheable=bool, threshold: float = None):
+    """
+    Decorate an async LLM method taking (self, user_query, ...) so repeat and
+    near-duplicate queries are answered from self.semantic_cache, and identical
+    concurrent queries share a single in-flight call.
+    scope derives a partition key from the first argument after user_query; cacheable
+    decides whether a fresh result is worth storing; threshold sets a
+    namespace-specific similarity cutoff.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, user_query: str, *args, **kwargs):
+            cache = self.semantic_cache
+            scope_key = scope(args[0]) if scope else ""
+
+            async def resolve():
+                cached = cache.lookup_exact(namespace, scope_key, user_query)
+                if cached is not None:
+                    return cached
+                if cache.embeddings:
+                    # Embed the query while the LLM call runs, so a miss costs no more than the call itself;
+                    # a hit cancels the call. store() reuses the embedding from the lookup
+                    call = asyncio.ensure_future(func(self, user_query, *args, **kwargs))
+                    try:
+                        cached = await cache.lookup_similar(namespace, scope_key, user_query, threshold)
+                    except BaseException:
+                        call.cancel()
+                        raise
+                    if cached is not None:
+                        call.cancel()
+                        return cached
+                    result = await call
+                else:
+                    result = await func(self, user_query, *args, **kwargs)
+                if cacheable(result):
+                    await cache.store(namespace, scope_key, user_query, result)
+                return result
+
+            inflight_key = (namespace, scope_key, normalize_text(user_query))
+            task = cache.inflight.get(inflight_key)
+            if task is None:
+                task = asyncio.ensure_future(resolve())
+                cache.inflight[inflight_key] = task
+                task.add_done_callback(lambda _: cache.inflight.pop(inflight_key, None))
+            else:
+                logger.info("Joining in-flight [%s] call for: '%.50s'", namespace, user_query)
+            # Shield so one cancelled caller does not cancel the shared call
+            return await asyncio.shield(task)
+        return wrapper
+    return decorator
+
+logger.info("LLM cache module loaded successfully")
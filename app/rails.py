@@ -4,6 +4,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_USER_ID_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+_STORE_ID_RE = re.compile(r'^[a-fA-F0-9]{24}$')
+
 class ValidationRails:
     """Validation and guardrails for grocery assistant operations"""
     
@@ -19,6 +22,8 @@ class ValidationRails:
         r'onload=',
         r'onerror=',
     ]
+    # One alternation, one group per pattern, so a single scan finds any blocked pattern
+    BLOCKED_RE = re.compile('|'.join(f'({pattern})' for pattern in BLOCKED_PATTERNS), re.IGNORECASE)
     
     @classmethod
     def validate_query(cls, query: str) -> Tuple[bool, str]:
@@ -34,10 +39,10 @@ class ValidationRails:
         if len(query) > cls.MAX_QUERY_LENGTH:
             return False, f"Query too long (max {cls.MAX_QUERY_LENGTH} characters)"
         
-        for pattern in cls.BLOCKED_PATTERNS:
-            if re.search(pattern, query, re.IGNORECASE):
-                logger.warning(f"Blocked query pattern detected: {pattern}")
-                return False, "Query contains invalid content"
+        match = cls.BLOCKED_RE.search(query)
+        if match:
+            logger.warning("Blocked query pattern detected: %s", cls.BLOCKED_PATTERNS[match.lastindex - 1])
+            return False, "Query contains invalid content"
         
         return True, "Valid"
     
@@ -55,7 +60,7 @@ class ValidationRails:
         if len(user_id) > cls.MAX_USER_ID_LENGTH:
             return False, f"User ID too long (max {cls.MAX_USER_ID_LENGTH} characters)"
 
-        if not re.match(r'^[a-zA-Z0-9_-]+$', user_id):
+        if not _USER_ID_RE.match(user_id):
             return False, "User ID can only contain letters, numbers, hyphens, and underscores"
         
         return True, "Valid"
@@ -74,7 +79,7 @@ class ValidationRails:
         if len(store_id) > cls.MAX_STORE_ID_LENGTH:
             return False, f"Store ID too long (max {cls.MAX_STORE_ID_LENGTH} characters)"
 
-        if not re.match(r'^[a-fA-F0-9]{24}$', store_id):
+        if not _STORE_ID_RE.match(store_id):
             return False, "Store ID must be a valid MongoDB ObjectId (24 hexadecimal characters)"
         
         return True, "Valid"
@@ -85,19 +90,17 @@ class ValidationRails:
         sanitized = []
         
         for category_result in results[:100]: 
-            if isinstance(category_result, dict) and "category" in category_result and "products" in category_result:
-                products = category_result["products"]
-                if isinstance(products, list):
-                    clean_products = []
-                    for product in products[:100]:  
-                        if isinstance(product, dict) and "ProductName" in product:
-                            clean_products.append(product)
-                    
-                    if clean_products:
-                        sanitized.append({
-                            "category": category_result["category"],
-                            "products": clean_products
-                        })
+            if not (isinstance(category_result, dict) and "category" in category_result and "products" in category_result):
+                continue
+            products = category_result["products"]
+            if not isinstance(products, list):
+                continue
+            clean_products = [product for product in products[:100] if isinstance(product, dict) and "ProductName" in product]
+            if clean_products:
+                sanitized.append({
+                    "category": category_result["category"],
+                    "products": clean_products
+                })
         
         return sanitized
 
@@ -1,175 +1,161 @@
-# import redis
-# import json
-# import os
-# import logging
-# from dotenv import load_dotenv
-# from datetime import datetime
-# from typing import Dict, Any, Optional
-# import hashlib
-
-# logger = logging.getLogger(__name__)
-# load_dotenv(override=True)
+import redis.asyncio as redis
+import orjson
+import os
+import logging
+from dotenv import load_dotenv
+from datetime import datetime
+import hashlib
 
-# CACHE_TTL_SECONDS = 172800
-# FREQUENT_CACHE_TTL = 259200
-# SIMILARITY_CACHE_TTL = 86400
+logger = logging.getLogger(__name__)
+load_dotenv(override=True)
 
-# try:
-#     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-#     logger.info(f"Connecting to Redis with caching: {redis_url}")
-#     r = redis.StrictRedis.from_url(redis_url, decode_responses=True)
-#     r.ping()
-#     logger.info("Redis connection established successfully")
-# except Exception as e:
-#     logger.error(f"Redis connection failed: {e}")
-#     r = None
+CACHE_TTL_SECONDS = 172800
+FREQUENT_CACHE_TTL = 259200
+SIMILARITY_CACHE_TTL = 86400
+MAX_USER_QUERIES = 100
+MAX_CONNECTIONS = 50
+# Redis-backed features are opt-in, each behind its own flag; REDIS_URL alone enables nothing
+USER_HISTORY_ENABLED = os.getenv("USER_HISTORY_ENABLED", "false").lower() == "true"
+SHARED_VALIDATION_CACHE = os.getenv("SHARED_VALIDATION_CACHE", "false").lower() == "true"
 
-# def save_user_query_to_redis(user_id: str, data: dict) -> bool:
-#     """Save user query data to Redis"""
-#     logger.info(f"Saving data to Redis for user: {user_id}")
-#     if not r:
-#         logger.error("Redis not available - skipping save")
-#         return False
-#     try:
-#         # Main user queries with 2-day TTL
-#         key = f"user_id:{user_id}:queries"
-#         r.rpush(key, json.dumps(data, default=str))
-#         r.expire(key, CACHE_TTL_SECONDS) 
-#         query_text = data.get('query', '')
-#         store_id = data.get('store_id', '')
-#         query_hash = hashlib.md5(query_text.lower().encode()).hexdigest()[:12]
-#         pattern_key = f"query_pattern:{query_hash}"
-#         r.setex(pattern_key, SIMILARITY_CACHE_TTL, json.dumps({
-#             'query': query_text,
-#             'categories': data.get('all_generated_categories', []),
-#             'timestamp': data.get('timestamp')
-#         }, default=str))
-#         store_query_key = f"store:{store_id}:frequent_queries"
-#         r.zincrby(store_query_key, 1, query_hash)
-#         r.expire(store_query_key, FREQUENT_CACHE_TTL)
-#         user_prefs_key = f"user:{user_id}:preferences"
-#         preferences = {
-#             'recent_cuisines': data.get('cuisinebased', []),
-#             'dietary_prefs': data.get('dietarypreferences', []),
-#             'recent_dishes': data.get('dishbased', []),
-#             'last_store': store_id,
-#             'updated_at': datetime.now().isoformat()
-#         }
-#         r.setex(user_prefs_key, FREQUENT_CACHE_TTL, json.dumps(preferences, default=str))
-#         logger.info(f"Data saved to Redis for user: {user_id} with 2-day TTL")
-#         return True
-#     except Exception as e:
-#         logger.error(f"Error saving to Redis: {e}")
-#         return False
+r = None
 
-# def get_user_queries_from_redis(user_id: str) -> list:
-#     """Get all queries for a user"""
-#     logger.info(f"Retrieving queries from Redis for user: {user_id}")
-#     if not r:
-#         logger.error("Redis not available")
-#         return []
-#     try:
-#         key = f"user_id:{user_id}:queries"
-#         queries = r.lrange(key, 0, -1)
-#         if not queries:
-#             logger.info(f"No queries found for user: {user_id}")
-#             return []
-#         parsed_queries = []
-#         for query in queries:
-#             try:
-#                 parsed_queries.append(json.loads(query))
-#             except json.JSONDecodeError as e:
-#                 logger.error(f"Error parsing query JSON: {e}")
-#                 continue
-#         parsed_queries.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-#         logger.info(f"Retrieved {len(parsed_queries)} queries for user: {user_id}")
-#         return parsed_queries
-#     except Exception as e:
-#         logger.error(f"Error retrieving queries from Redis: {e}")
-#         return []
+async def init_redis():
+    """Connect the shared async Redis client if REDIS_URL is configured and a Redis-backed feature is enabled"""
+    global r
+    if not (USER_HISTORY_ENABLED or SHARED_VALIDATION_CACHE):
+        logger.info("No Redis-backed feature enabled - running without Redis")
+        return
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        logger.info("REDIS_URL not set - running without Redis cache")
+        return
+    client = None
+    try:
+        logger.info("Connecting to Redis with caching: %s", redis_url)
+        pool = redis.ConnectionPool.from_url(redis_url, max_connections=MAX_CONNECTIONS, decode_responses=True)
+        client = redis.Redis(connection_pool=pool)
+        await client.ping()
+        r = client
+        logger.info("Redis connection established successfully")
+    except Exception as e:
+        logger.error("Redis connection failed: %s", e)
+        if client is not None:
+            await client.aclose(close_connection_pool=True)
+        r = None
 
-# def get_cached_query_similarity(query: str, store_id: str) -> Optional[Dict]:
-#     if not r:
-#         return None
-#     try:
-#         query_hash = hashlib.md5(query.lower().encode()).hexdigest()[:12]
-#         pattern_key = f"query_pattern:{query_hash}"
-#         cached_data = r.get(pattern_key)
-#         if cached_data:
-#             logger.info(f"Found cached similarity for query hash: {query_hash}")
-#             return json.loads(cached_data)
-#         return None
-#     except Exception as e:
-#         logger.debug(f"Error checking query similarity cache: {e}")
-#         return None
+async def close_redis():
+    """Release the shared Redis connection pool"""
+    global r
+    if r is not None:
+        await r.aclose(close_connection_pool=True)
+        r = None
+        logger.info("Redis connection closed")
 
-# def cache_product_matching_result(query: str, store_id: str, result: Dict):
-#     if not r:
-#         return
-#     try:
-#         cache_key = f"product_match:{hashlib.md5(f'{query}:{store_id}'.encode()).hexdigest()[:16]}"
-#         r.setex(cache_key, CACHE_TTL_SECONDS, json.dumps(result, default=str))
-#         logger.info(f"Cached product matching result for query: {query[:30]}...")
-#     except Exception as e:
-#         logger.debug(f"Error caching product matching result: {e}")
+def is_history_enabled() -> bool:
+    """Whether user history is persisted to and served from Redis"""
+    return USER_HISTORY_ENABLED and r is not None
 
-# def get_cached_product_matching_result(query: str, store_id: str) -> Optional[Dict]:
-#     if not r:
-#         return None
-#     try:
-#         cache_key = f"product_match:{hashlib.md5(f'{query}:{store_id}'.encode()).hexdigest()[:16]}"
-#         cached_result = r.get(cache_key)
-#         if cached_result:
-#             logger.info(f"Found cached product matching result for query: {query[:30]}...")
-#             return json.loads(cached_result)
-#         return None
-#     except Exception as e:
-#         logger.debug(f"Error retrieving cached product matching result: {e}")
-#         return None
+async def save_user_query_to_redis(user_id: str, data: dict) -> bool:
+    """Save user query data to Redis in a single pipelined round-trip"""
+    logger.info("Saving data to Redis for user: %s", user_id)
+    if not r:
+        logger.error("Redis not available - skipping save")
+        return False
+    try:
+        query_text = data.get('query', '')
+        store_id = data.get('store_id', '')
+        query_hash = hashlib.md5(query_text.lower().encode()).hexdigest()[:12]
+        key = f"user_id:{user_id}:queries"
+        pattern_key = f"query_pattern:{query_hash}"
+        store_query_key = f"store:{store_id}:frequent_queries"
+        user_prefs_key = f"user:{user_id}:preferences"
+        preferences = {
+            'recent_cuisines': data.get('cuisinebased', []),
+            'dietary_prefs': data.get('dietarypreferences', []),
+            'recent_dishes': data.get('dishbased', []),
+            'last_store': store_id,
+            'updated_at': datetime.now().isoformat()
+        }
 
-# def warm_cache_for_user(user_id: str, store_id: str):
-#     if not r:
-#         return
-#     try:
-#         user_prefs_key = f"user:{user_id}:preferences"
-#         prefs_data = r.get(user_prefs_key)
-#         if prefs_data:
-#             preferences = json.loads(prefs_data)
-#             recent_cuisines = preferences.get('recent_cuisines', [])
-#             for cuisine in recent_cuisines[:2]:
-#                 logger.info(f"Cache warming queued for cuisine: {cuisine}")
-#         logger.info(f"Cache warming completed for user: {user_id}")
-#     except Exception as e:
-#         logger.debug(f"Error in cache warming: {e}")
+        async with r.pipeline(transaction=False) as pipe:
+            # Main user queries with 2-day TTL, capped to the most recent entries
+            pipe.rpush(key, orjson.dumps(data, default=str))
+            pipe.ltrim(key, -MAX_USER_QUERIES, -1)
+            pipe.expire(key, CACHE_TTL_SECONDS)
+            pipe.setex(pattern_key, SIMILARITY_CACHE_TTL, orjson.dumps({
+                'query': query_text,
+                'categories': data.get('all_generated_categories', []),
+                'timestamp': data.get('timestamp')
+            }, default=str))
+            pipe.zincrby(store_query_key, 1, query_hash)
+            pipe.expire(store_query_key, FREQUENT_CACHE_TTL)
+            pipe.setex(user_prefs_key, FREQUENT_CACHE_TTL, orjson.dumps(preferences, default=str))
+            await pipe.execute()
 
-# def maintain_cache():
-#     if not r:
-#         return
-#     try:
-#         logger.info("Cache maintenance completed")
-#     except Exception as e:
-#         logger.error(f"Error in cache maintenance: {e}")
+        logger.info("Data saved to Redis for user: %s with 2-day TTL", user_id)
+        return True
+    except Exception as e:
+        logger.error("Error saving to Redis: %s", e)
+        return False
 
-# def get_cache_stats():
-#     if not r:
-#         return {}
-#     try:
-#         info = r.info('memory')
-#         return {
-#             'used_memory': info.get('used_memory_human'),
-#             'max_memory': info.get('maxmemory_human'),
-#             'memory_usage': info.get('used_memory_percentage', 0),
-#             'connected_clients': r.info('clients').get('connected_clients', 0),
-#             'cache_hit_ratio': 'N/A'
-#         }
-#     except Exception as e:
-#         logger.error(f"Error getting cache stats: {e}")
-#         return {}
+async def get_user_queries_from_redis(user_id: str) -> list:
+    """Get all queries for a user"""
+    logger.info("Retrieving queries from Redis for user: %s", user_id)
+    if not r:
+        logger.error("Redis not available")
+        return []
+    try:
+        key = f"user_id:{user_id}:queries"
+        queries = await r.lrange(key, 0, -1)
+        if not queries:
+            logger.info("No queries found for user: %s", user_id)
+            return []
+        parsed_queries = []
+        for query in queries:
+            try:
+                parsed_queries.append(orjson.loads(query))
+            except orjson.JSONDecodeError as e:
+                logger.error("Error parsing query JSON: %s", e)
+                continue
+        parsed_queries.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        logger.info("Retrieved %s queries for user: %s", len(parsed_queries), user_id)
+        return parsed_queries
+    except Exception as e:
+        logger.error("Error retrieving queries from Redis: %s", e)
+        return []
 
-# logger.info("Redis cache module loaded successfully")
+async def get_validation_decisions(keys: list) -> dict:
+    """
+    Fetch the validation decisions stored under keys, with their remaining lifetimes, in one pipelined round-trip.
+    Returns {key: ("1"/"0", seconds left)} for the keys found
+    """
+    if not SHARED_VALIDATION_CACHE or not r or not keys:
+        return {}
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.mget(keys)
+            for key in keys:
+                pipe.pttl(key)
+            values, *pttls = await pipe.execute()
+    except Exception as e:
+        logger.error("Error reading validation decisions from Redis: %s", e)
+        return {}
+    # PTTL is negative for keys that expired between the two reads or carry no expiry; skip both
+    return {key: (value, pttl / 1000) for key, value, pttl in zip(keys, values, pttls) if value is not None and pttl > 0}
 
+async def save_validation_decisions(decisions: dict, ttl: int) -> bool:
+    """Store {key: "1"/"0"} validation decisions for ttl seconds in a single pipelined round-trip"""
+    if not SHARED_VALIDATION_CACHE or not r or not decisions:
+        return False
+    try:
+        async with r.pipeline(transaction=False) as pipe:
+            for key, value in decisions.items():
+                pipe.setex(key, ttl, value)
+            await pipe.execute()
+        return True
+    except Exception as e:
+        logger.error("Error saving validation decisions to Redis: %s", e)
+        return False
 
-import logging
-logger = logging.getLogger(__name__)
-logger.info("Redis module disabled - running without cache")
-# Redis caching is currently disabled.
\ No newline at end of file
+logger.info("Redis cache module loaded successfully")
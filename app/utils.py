@@ -1,7 +1,13 @@
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r'[a-z0-9]+')
+# Product-name words marking a kitchen appliance/accessory; a candidate carrying one the item lacks is rejected without asking the LLM.
+# Processed forms ("flour", "sauce") are left to the LLM, since whether they fit depends on the item and query
+AUTO_REJECT_WORDS = frozenset({"dispenser", "cooker"})
+
 def safe_float(val, fallback=0.0):
     """Safely convert value to float"""
     try:
@@ -41,6 +47,15 @@ def normalize_text(text):
     
     return normalized
 
+def singular_words(text: str):
+    """Lowercased words of text with a plural "s" dropped, in order, so "cookers" and "cooker" compare equal"""
+    return [word[:-1] if len(word) > 3 and word.endswith("s") else word for word in _WORD_RE.findall(text.lower())]
+
+def is_accessory(item: str, product_name: str):
+    """True when the product name has an AUTO_REJECT_WORDS word the item does not (e.g. "Oil Dispenser" for "oil")"""
+    extra_words = AUTO_REJECT_WORDS.intersection(singular_words(product_name))
+    return bool(extra_words) and not extra_words <= set(singular_words(item))
+
 def calculate_match_confidence(score, method="fuzzy"):
     """Calculate confidence level based on match score"""
     if method == "exact":
@@ -0,0 +1,23 @@
+import os
+import multiprocessing
+
+# Gunicorn settings for production: N Uvicorn workers (uvloop + httptools via uvicorn[standard])
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Heartbeat files on tmpfs so a slow disk never stalls workers
+worker_tmp_dir = "/dev/shm"
+
+# ProductMatching waits on several LLM round-trips
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# No preload: app.db opens its MongoClient at import and pymongo clients are not fork-safe,
+# so every worker imports the app (and connects) on its own
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
@@ -1,6 +1,9 @@
 import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.api import router
+from app.redis_cache import init_redis, close_redis
+from app.core_matcher import get_core_matcher
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -14,7 +17,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Buy2Cash AI Grocery Assistant",
     version="1.0.0",
-    description="Glrocery product matching with AI"
+    description="Glrocery product matching with AI",
+    default_response_class=ORJSONResponse
 )
 
 app.include_router(router)
@@ -33,11 +37,17 @@ async def health_check():
 
 @app.on_event("startup")
 async def startup_event():
+    await init_redis()
+    # Build the matcher (LLM clients, caches) now so the first request does not pay for it
+    get_core_matcher()
     logger.info("Buy2Cash Grocery AI Assistant started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Buy2Cash Grocery AI Assistant shutting down")
+    await close_redis()
+    if get_core_matcher.cache_info().currsize:
+        await get_core_matcher().aclose()
 
 if __name__ == "__main__":
     import uvicorn
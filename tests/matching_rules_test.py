@@ -0,0 +1,17 @@
+from app.utils import is_accessory, singular_words
+
+def test_singular_words_keeps_order():
+    assert singular_words("Pressure Cookers & Rice") == ["pressure", "cooker", "rice"]
+    assert singular_words("Gas") == ["gas"]
+
+def test_accessory_auto_reject_keeps_real_products():
+    for item, product_name in [
+        ("besan", "Gram Flour (Besan) 500g"),
+        ("atta", "Aashirvaad Whole Wheat Flour Atta 5kg"),
+        ("sriracha", "Sriracha Hot Chilli Sauce"),
+        ("storage containers", "Airtight Plastic Container 1L"),
+        ("pressure cookers", "Prestige Pressure Cooker 3L"),
+    ]:
+        assert not is_accessory(item, product_name), product_name
+    assert is_accessory("oil", "Oil Dispenser")
+    assert is_accessory("rice", "Prestige Rice Cooker")
@@ -13,6 +13,7 @@ def run_pytest():
     with open(txt_file, "w") as f:
         exit_code = pytest.main([
             "unit_test.py",
+            "matching_rules_test.py",
             "integration_test.py",
             "system_test.py",
             "regression_test.py",
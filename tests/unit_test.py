@@ -19,3 +19,11 @@ def test_health_check():
     assert resp.status_code == 200
     data = resp.json()
     assert data["status"] == "healthy"
+
+def test_categories_etag_revalidation():
+    resp = requests.get(f"{BASE_URL}/categories")
+    assert resp.status_code == 200
+    etag = resp.headers.get("ETag")
+    assert etag
+    resp = requests.get(f"{BASE_URL}/categories", headers={"If-None-Match": etag})
+    assert resp.status_code == 304